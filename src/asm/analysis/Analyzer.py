@@ -0,0 +1,332 @@
+from os import makedirs
+from typing import Iterable
+from asm.common import *
+from asm.common.inst import *
+from .CostTable import *
+from asm.two_pass.parser import Parser, ParseContext
+from asm.two_pass.generator import CodeGenerator
+
+# Registro de 32 bits al que pertenece cada nombre de registro
+FAMILY = {name: ['eax', 'ecx', 'edx', 'ebx', 'esp', 'ebp', 'esi', 'edi'][reg] for name, reg in REGISTERS.items()}
+FAMILY.update({'ah': 'eax', 'ch': 'ecx', 'dh': 'edx', 'bh': 'ebx'})
+
+BRANCHES = (JmpInstruction, JeInstruction, JneInstruction, JleInstruction, JlInstruction,
+	JzInstruction, JnzInstruction, JaInstruction, JaeInstruction, JbInstruction,
+	JbeInstruction, JgInstruction, JgeInstruction, LoopInstruction)
+
+# Micro-operaciones que el núcleo puede emitir por ciclo
+ISSUE_WIDTH = 4
+
+def _regs(expr: Expression) -> set[str]:
+	if isinstance(expr, IdentifierExpression) and expr.reg is not None:
+		return {FAMILY[expr.name.lower()]}
+	return set()
+
+def register_effects(inst: Instruction) -> tuple[set[str], set[str]]:
+	"""Registros (y banderas) que lee y escribe una instrucción. La memoria no se modela."""
+	match inst:
+		case MoveInstruction() | MovzxInstruction():
+			return _regs(inst.src), _regs(inst.dest)
+		case LeaInstruction():
+			return set(), _regs(inst.reg)
+		case XorInstruction() if _regs(inst.dest) and _regs(inst.dest) == _regs(inst.src):
+			# Modismo de cero: no depende del valor anterior
+			return set(), _regs(inst.dest) | {'flags'}
+		case AddInstruction() | SubInstruction() | AndInstruction() | OrInstruction() | XorInstruction() | ImulTwoInstruction():
+			return _regs(inst.dest) | _regs(inst.src), _regs(inst.dest) | {'flags'}
+		case CmpInstruction() | TestInstruction():
+			return _regs(inst.op1) | _regs(inst.op2), {'flags'}
+		case XchgInstruction():
+			both = _regs(inst.op1) | _regs(inst.op2)
+			return both, both
+		case IncInstruction() | DecInstruction():
+			return _regs(inst.op), _regs(inst.op) | {'flags'}
+		case MulInstruction() | ImulInstruction():
+			return {'eax'} | _regs(inst.op), {'eax', 'edx', 'flags'}
+		case DivInstruction() | IdivInstruction():
+			return {'eax', 'edx'} | _regs(inst.op), {'eax', 'edx', 'flags'}
+		case PushInstruction():
+			return {'esp'} | _regs(inst.op), {'esp'}
+		case PopInstruction():
+			return {'esp'}, {'esp'} | _regs(inst.op)
+		case CallInstruction() | RetInstruction():
+			return {'esp'}, {'esp'}
+		case LoopInstruction():
+			return {'ecx'}, {'ecx'}
+		case JmpInstruction():
+			return set(), set()
+		case IntInstruction():
+			return {'eax', 'ebx', 'ecx', 'edx'}, {'eax'}
+	if isinstance(inst, BRANCHES):
+		return {'flags'}, set()
+	return set(), set()
+
+class ListingLine:
+	"""Una instrucción del listado: dirección, bytes, código fuente y costo."""
+	__slots__ = ('address', 'code', 'source', 'inst', 'cost', 'labels', 'block')
+
+	def __init__(self, address: int, code: str, source: str, inst: Instruction, cost: Cost | None, labels: list[str]):
+		self.address = address
+		self.code = code
+		self.source = source
+		self.inst = inst
+		self.cost = cost
+		self.labels = labels
+		self.block: Block | None = None
+
+class Chain:
+	"""Cadena de dependencias a través de registros."""
+
+	def __init__(self, latency: float, lines: list[ListingLine]):
+		self.latency = latency
+		self.lines = lines
+
+	def __str__(self):
+		return " -> ".join(f"0x{line.address:08X} {line.source}" for line in self.lines) or "(ninguna)"
+
+def _latency_bound(lines: list[ListingLine]) -> Chain:
+	"""Cadena más larga dentro de una secuencia, suponiendo registros listos al inicio."""
+	ready: dict[str, tuple[float, tuple | None]] = {}
+	best: tuple[float, tuple | None] = (0, None)
+	for line in lines:
+		reads, writes = register_effects(line.inst)
+		start, prev = max((ready.get(reg, (0, None)) for reg in reads), key=lambda r: r[0], default=(0, None))
+		node = (start + line.cost.latency, (line, prev))
+		for reg in writes: ready[reg] = node
+		if node[0] > best[0]: best = node
+	return Chain(best[0], _unwind(best[1]))
+
+def _recurrence_bound(lines: list[ListingLine]) -> tuple[str | None, Chain]:
+	"""
+	Cadena más larga que lleva el valor de un registro de una iteración
+	a la siguiente: acota los ciclos por iteración de un ciclo.
+	"""
+	# Registro -> {registro al inicio de la iteración: (latencia, cadena)}
+	deps: dict[str, dict[str, tuple[float, tuple | None]]] = {}
+	for line in lines:
+		reads, writes = register_effects(line.inst)
+		combined: dict[str, tuple[float, tuple | None]] = {}
+		for reg in reads:
+			for origin, (latency, chain) in deps.get(reg, {reg: (0, None)}).items():
+				if origin not in combined or latency + line.cost.latency > combined[origin][0]:
+					combined[origin] = (latency + line.cost.latency, (line, chain))
+		for reg in writes: deps[reg] = combined
+
+	best_reg, best = None, (0, None)
+	for reg, origins in deps.items():
+		carried = origins.get(reg)
+		if carried is not None and carried[1] is not None and carried[0] > best[0]:
+			best_reg, best = reg, carried
+	return best_reg, Chain(best[0], _unwind(best[1]))
+
+def _unwind(link: tuple | None) -> list[ListingLine]:
+	# Cada eslabón es (línea, eslabón de la instrucción de la que depende)
+	lines = []
+	while link is not None:
+		line, link = link
+		lines.append(line)
+	lines.reverse()
+	return lines
+
+class Block:
+	"""Bloque básico del programa ensamblado con su estimación de ciclos."""
+
+	def __init__(self, index: int, lines: list[ListingLine]):
+		self.index = index
+		self.lines = lines
+		self.labels = [label for line in lines[:1] for label in line.labels]
+		self.uops = sum(line.cost.uops for line in lines)
+		self.throughput = sum(line.cost.throughput for line in lines)
+		self.chain = _latency_bound(lines)
+
+	@property
+	def cycles(self) -> float:
+		return max(self.throughput, self.uops / ISSUE_WIDTH, self.chain.latency)
+
+	@property
+	def bound(self) -> str:
+		return _bound_name(self.throughput, self.uops, self.chain.latency)
+
+	@property
+	def start(self) -> int:
+		return self.lines[0].address
+
+	@property
+	def end(self) -> int:
+		last = self.lines[-1]
+		return last.address + len(last.code.replace(" ", "")) // 2
+
+class Loop:
+	"""
+	Ciclo formado por un salto hacia atrás y los bloques entre destino y
+	salto. Los ciclos internos cuentan como una sola iteración.
+	"""
+
+	def __init__(self, head: str, blocks: list[Block]):
+		self.head = head
+		self.blocks = blocks
+		self.lines = [line for block in blocks for line in block.lines]
+		self.uops = sum(block.uops for block in blocks)
+		self.throughput = sum(block.throughput for block in blocks)
+		self.register, self.chain = _recurrence_bound(self.lines)
+
+	@property
+	def cycles(self) -> float:
+		return max(self.throughput, self.uops / ISSUE_WIDTH, self.chain.latency)
+
+	@property
+	def bound(self) -> str:
+		return _bound_name(self.throughput, self.uops, self.chain.latency)
+
+def _bound_name(throughput: float, uops: int, latency: float) -> str:
+	limits = {'rendimiento': throughput, 'emisión de uops': uops / ISSUE_WIDTH, 'latencia': latency}
+	return max(limits, key=limits.get)
+
+class Analysis:
+	def __init__(self, lines: list[ListingLine], blocks: list[Block], loops: list[Loop], warnings: list[str]):
+		self.listing = lines
+		self.blocks = blocks
+		self.loops = loops
+		self.warnings = warnings
+
+	def lines(self):
+		"""Genera el reporte línea por línea, como las tablas de símbolos."""
+		yield "Listado:"
+		yield "-" * 100
+		yield f"{'Dirección':<12}{'Bytes':<30}{'Código':<34}{'Lat':>5}{'Rec':>7}{'uops':>6}"
+		yield "-" * 100
+		for line in self.listing:
+			for label in line.labels: yield f"{'':<12}{'':<30}{label}:"
+			cost = line.cost
+			costs = f"{cost.latency:>5g}{cost.throughput:>7.2f}{cost.uops:>6}" if cost else ""
+			yield f"0x{line.address:08X}  {line.code:<29} {line.source[:33]:<34}{costs}"
+		yield "-" * 100
+
+		yield ""
+		yield "Bloques básicos:"
+		for block in self.blocks:
+			name = ", ".join(block.labels) or "-"
+			yield (f"  B{block.index} 0x{block.start:08X}-0x{block.end:08X} ({name}): {len(block.lines)} instrucciones, "
+				f"{block.uops} uops, ~{block.cycles:.2f} ciclos (límite: {block.bound})")
+			if block.chain.latency > 0:
+				yield f"      Cadena crítica ({block.chain.latency:g} ciclos): {block.chain}"
+
+		yield ""
+		if not self.loops:
+			yield "Ciclos: (ninguno)"
+		else:
+			yield "Ciclos:"
+		for loop in self.loops:
+			blocks = ", ".join(f"B{block.index}" for block in loop.blocks)
+			yield (f"  {loop.head} ({blocks}): {loop.uops} uops, ~{loop.cycles:.2f} ciclos por iteración "
+				f"(límite: {loop.bound})")
+			if loop.register is not None:
+				yield f"      Dependencia entre iteraciones por {loop.register} ({loop.chain.latency:g} ciclos): {loop.chain}"
+
+		yield ""
+		if not self.warnings:
+			yield "Advertencias: (ninguna)"
+		else:
+			yield "Advertencias:"
+		for warning in self.warnings:
+			yield f"  {warning}"
+
+	def __str__(self):
+		return "\n".join(self.lines())
+
+class Analyzer:
+	"""
+	Análisis estático de rendimiento sobre el resultado de 2 pasadas:
+	divide el código en bloques básicos, estima ciclos por bloque y por
+	iteración de cada ciclo, y señala instrucciones lentas. No ejecuta nada.
+	"""
+
+	def __init__(self, cache_size: int = 4096, eliminate: bool = False, align_loops: int = 0):
+		self.cache_size = cache_size
+		self.parser = Parser(cache_size, eliminate=eliminate, align_loops=align_loops)
+		self.generator = CodeGenerator()
+
+	def run(self, name: str, in_dir: str, out_dir: str):
+		makedirs(out_dir, exist_ok=True)
+		with open(f"{in_dir}/{name}.asm", "r", encoding="utf-8") as file:
+			analysis = self.analyze_lines(file.read().splitlines())
+		out_file = f"{out_dir}/{name}.analysis.txt"
+		write_lines(out_file, analysis.lines())
+		print(f"Análisis escrito a {out_file}")
+
+	def analyze_source(self, source: str | bytes | Iterable[str | bytes]) -> Analysis:
+		return self.analyze_lines(source_lines(source))
+
+	def analyze_lines(self, lines: Iterable[str]) -> Analysis:
+		listing = self._assemble(lines)
+		blocks = self._split_blocks(listing)
+		loops = self._find_loops(listing, blocks)
+		return Analysis(listing, blocks, loops, self._warnings(listing, loops))
+
+	def _assemble(self, lines: Iterable[str]) -> list[ListingLine]:
+		# Pasada 1 de Parser, conservando la línea de origen de cada elemento
+		ctx = ParseContext(self.cache_size)
+		items = [(*parsed, source.split(';', 1)[0].strip()) for source, parsed in self.parser.placeLines(ctx, lines, strict=True)]
+
+		# Pasada 2 como en CodeGenerator, una instrucción a la vez
+		gen_ctx = AssemblyContext(0, ctx.symbol_table)
+		names = ctx.interner.names
+		listing: list[ListingLine] = []
+		labels: list[str] = []
+		for label_id, inst, text in items:
+			if inst is None:
+				labels.append(names[label_id])
+				continue
+			code = self.generator.encodeInstruction(gen_ctx, inst)
+			size = len(code.replace(" ", "")) // 2
+			listing.append(ListingLine(gen_ctx.current_address, code, text, inst, instruction_cost(inst, size), labels))
+			labels = []
+			gen_ctx.current_address += size
+		return listing
+
+	def _split_blocks(self, listing: list[ListingLine]) -> list[Block]:
+		blocks: list[Block] = []
+		current: list[ListingLine] = []
+		for line in listing:
+			if line.cost is None or (line.labels and current):
+				if current: blocks.append(Block(len(blocks), current))
+				current = []
+				if line.cost is None: continue
+			current.append(line)
+			if isinstance(line.inst, BRANCHES + (CallInstruction, RetInstruction)):
+				blocks.append(Block(len(blocks), current))
+				current = []
+		if current: blocks.append(Block(len(blocks), current))
+		for block in blocks:
+			for line in block.lines: line.block = block
+		return blocks
+
+	def _find_loops(self, listing: list[ListingLine], blocks: list[Block]) -> list[Loop]:
+		# Bloque que empieza en cada etiqueta (gana la última definición)
+		heads: dict[str, Block] = {}
+		for line in listing:
+			for label in line.labels:
+				if line.block is not None: heads[label] = line.block
+		loops = []
+		for block in blocks:
+			last = block.lines[-1].inst
+			if not isinstance(last, BRANCHES): continue
+			head = heads.get(last.label)
+			if head is not None and head.index <= block.index:
+				loops.append(Loop(last.label, blocks[head.index:block.index + 1]))
+		return loops
+
+	def _warnings(self, listing: list[ListingLine], loops: list[Loop]) -> list[str]:
+		warnings = []
+		seen: set[int] = set()
+		# Primero los ciclos más internos (más cortos)
+		for loop in sorted(loops, key=lambda loop: len(loop.lines)):
+			for line in loop.lines:
+				mnemonic = MNEMONICS.get(type(line.inst))
+				if mnemonic in SLOW and id(line) not in seen:
+					seen.add(id(line))
+					warnings.append(f"0x{line.address:08X} {line.source} (ciclo {loop.head}): {SLOW[mnemonic]}")
+		for line in listing:
+			if isinstance(line.inst, XchgInstruction) and 'm' in instruction_form(line.inst) and id(line) not in seen:
+				warnings.append(f"0x{line.address:08X} {line.source}: {SLOW['xchg']}")
+		return warnings
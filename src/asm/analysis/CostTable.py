@@ -0,0 +1,90 @@
+from asm.common.inst import *
+
+class Cost:
+	"""Latencia (ciclos), rendimiento recíproco (ciclos) y micro-operaciones."""
+	__slots__ = ('latency', 'throughput', 'uops')
+
+	def __init__(self, latency: float, throughput: float, uops: int):
+		self.latency = latency
+		self.throughput = throughput
+		self.uops = uops
+
+	def __repr__(self):
+		return f"Cost({self.latency}, {self.throughput}, {self.uops})"
+
+MNEMONICS: dict[type, str] = {
+	MoveInstruction: 'mov', AddInstruction: 'add', SubInstruction: 'sub', XorInstruction: 'xor',
+	AndInstruction: 'and', OrInstruction: 'or', MovzxInstruction: 'movzx', XchgInstruction: 'xchg',
+	CmpInstruction: 'cmp', TestInstruction: 'test', LeaInstruction: 'lea', IncInstruction: 'inc',
+	DecInstruction: 'dec', MulInstruction: 'mul', ImulInstruction: 'imul', ImulTwoInstruction: 'imul',
+	DivInstruction: 'div', IdivInstruction: 'idiv', PushInstruction: 'push', PopInstruction: 'pop',
+	IntInstruction: 'int', JmpInstruction: 'jmp', JeInstruction: 'je', JneInstruction: 'jne',
+	JleInstruction: 'jle', JlInstruction: 'jl', JzInstruction: 'jz', JnzInstruction: 'jnz',
+	JaInstruction: 'ja', JaeInstruction: 'jae', JbInstruction: 'jb', JbeInstruction: 'jbe',
+	JgInstruction: 'jg', JgeInstruction: 'jge', CallInstruction: 'call', LoopInstruction: 'loop',
+	RetInstruction: 'ret', NopInstruction: 'nop', AlignInstruction: 'align',
+	DataDeclarationInstruction: 'data',
+}
+
+# Costos aproximados de x86 de 32 bits en un núcleo moderno (tipo Skylake),
+# por mnemónico y forma de operandos: r = registro, m = memoria, i = inmediato.
+# '*' es el valor para cualquier forma no listada.
+COSTS: dict[str, dict[str, Cost]] = {
+	'mov':   {'r,r': Cost(1, 0.25, 1), 'r,i': Cost(1, 0.25, 1), 'r,m': Cost(5, 0.5, 1), 'm,r': Cost(1, 1, 1), '*': Cost(1, 1, 1)},
+	'movzx': {'r,r': Cost(1, 0.25, 1), '*': Cost(5, 0.5, 1)},
+	'add':   {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 1, 2), 'm,i': Cost(6, 1, 2), '*': Cost(1, 0.25, 1)},
+	'sub':   {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 1, 2), 'm,i': Cost(6, 1, 2), '*': Cost(1, 0.25, 1)},
+	'and':   {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 1, 2), 'm,i': Cost(6, 1, 2), '*': Cost(1, 0.25, 1)},
+	'or':    {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 1, 2), 'm,i': Cost(6, 1, 2), '*': Cost(1, 0.25, 1)},
+	'xor':   {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 1, 2), 'm,i': Cost(6, 1, 2), '*': Cost(1, 0.25, 1)},
+	'cmp':   {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 0.5, 1), 'm,i': Cost(6, 0.5, 1), '*': Cost(1, 0.25, 1)},
+	'test':  {'r,m': Cost(6, 0.5, 1), 'm,r': Cost(6, 0.5, 1), '*': Cost(1, 0.25, 1)},
+	'inc':   {'m': Cost(6, 1, 3), '*': Cost(1, 0.25, 1)},
+	'dec':   {'m': Cost(6, 1, 3), '*': Cost(1, 0.25, 1)},
+	'lea':   {'*': Cost(1, 0.5, 1)},
+	'xchg':  {'r,r': Cost(2, 1, 3), '*': Cost(20, 20, 8)},
+	'mul':   {'m': Cost(9, 1, 3), '*': Cost(4, 1, 3)},
+	'imul':  {'r,r': Cost(3, 1, 1), 'r,i': Cost(3, 1, 1), 'r,m': Cost(8, 1, 1), 'm': Cost(9, 1, 3), '*': Cost(4, 1, 3)},
+	'div':   {'m': Cost(31, 6, 11), '*': Cost(26, 6, 10)},
+	'idiv':  {'m': Cost(31, 6, 11), '*': Cost(26, 6, 10)},
+	'push':  {'m': Cost(3, 1, 2), '*': Cost(3, 1, 1)},
+	'pop':   {'m': Cost(6, 1, 2), '*': Cost(2, 0.5, 1)},
+	'jmp':   {'*': Cost(0, 1, 1)},
+	'call':  {'*': Cost(0, 3, 2)},
+	'ret':   {'*': Cost(0, 2, 1)},
+	'loop':  {'*': Cost(1, 5, 7)},
+	'int':   {'*': Cost(100, 100, 20)},
+	'nop':   {'*': Cost(0, 0.25, 1)},
+}
+for jump in ('je', 'jne', 'jle', 'jl', 'jz', 'jnz', 'ja', 'jae', 'jb', 'jbe', 'jg', 'jge'):
+	COSTS[jump] = {'*': Cost(0, 0.5, 1)}
+
+# Instrucciones lentas y la alternativa sugerida
+SLOW: dict[str, str] = {
+	'loop': "7 uops; usar 'dec ecx' + 'jnz'",
+	'div': "~26 ciclos de latencia; evitar en ciclos internos (multiplicar por el inverso o usar corrimientos)",
+	'idiv': "~26 ciclos de latencia; evitar en ciclos internos (multiplicar por el inverso o usar corrimientos)",
+	'xchg': "3 uops con registros y bloqueo implícito con memoria; usar 'mov'",
+}
+
+def operand_form(expr: Expression) -> str:
+	match expr:
+		case MemoryExpression(): return 'm'
+		case IntegerExpression(): return 'i'
+		case IdentifierExpression(reg=None): return 'i'
+	return 'r'
+
+def instruction_form(inst: Instruction) -> str:
+	operands = [value for value in vars(inst).values() if isinstance(value, Expression)]
+	return ','.join(map(operand_form, operands))
+
+def instruction_cost(inst: Instruction, size: int = 0) -> Cost | None:
+	"""Costo de una instrucción, o None si no se ejecuta (datos)."""
+	mnemonic = MNEMONICS.get(type(inst))
+	if mnemonic is None or mnemonic == 'data': return None
+	if mnemonic == 'align':
+		# El relleno son NOPs de hasta 9 bytes
+		nops = -(-size // MAX_NOP)
+		return Cost(0, 0.25 * nops, nops)
+	forms = COSTS[mnemonic]
+	return forms.get(instruction_form(inst), forms['*'])
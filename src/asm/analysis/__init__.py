@@ -0,0 +1,2 @@
+from .CostTable import *
+from .Analyzer import *
\ No newline at end of file
@@ -1,21 +1,75 @@
 from os import makedirs
 from time import perf_counter
+from functools import partial
+from typing import Iterable
 from .Result import *
+from .OutputWriter import *
+from .OutputFormat import *
+
+def source_lines(source: str | bytes | Iterable[str | bytes]) -> Iterable[str]:
+	"""Convierte código fuente (texto, bytes o líneas) en líneas de texto."""
+	if isinstance(source, (bytes, bytearray, memoryview)):
+		source = bytes(source).decode("utf-8")
+	if isinstance(source, str):
+		return source.splitlines()
+	return (line.decode("utf-8").rstrip("\r\n") if isinstance(line, (bytes, bytearray))
+		else line.rstrip("\r\n") for line in source)
 
 class AssemblerI:
 
 	def __init__(self, name: str):
 		self.name = name
+		# Salidas a generar y opciones de escritura
+		self.write_code = True
+		self.formats: list[str] = ["hex"]
+		self.write_ref = True
+		self.write_sim = True
+		self.fsync = False
+		self.chunk_size = 1 << 16
 
 	def assemble(self, filename: str) -> Result:
 		raise RuntimeError(f"Assemble not implemented for {self}")
 
+	def assemble_lines(self, lines: Iterable[str]) -> Result:
+		raise RuntimeError(f"Assemble not implemented for {self}")
+
+	def assemble_source(self, source: str | bytes | Iterable[str | bytes]) -> Result:
+		"""
+		Ensambla código en memoria: no lee ni escribe archivos y no imprime.
+		Los errores se lanzan como excepciones.
+		"""
+		return self.assemble_lines(source_lines(source))
+
 	def run(self, name: str, in_dir: str, out_dir: str):
 
-		in_file = f"{in_dir}/{name}.asm"
+		makedirs(out_dir, exist_ok=True)
+		result = self._assemble_timed(name, in_dir)
+		self.write(result, name, out_dir)
+
+	def run_all(self, names: list[str], in_dir: str, out_dir: str, max_pending: int = 2):
+		"""
+		Ensambla varios archivos. La escritura del archivo N se hace en
+		un hilo de fondo mientras se ensambla el archivo N+1; los mensajes
+		de escritura se imprimen desde este hilo al terminar cada trabajo.
+		"""
 
 		makedirs(out_dir, exist_ok=True)
 
+		with OutputWriter(max_pending) as writer:
+			for name in names:
+				result = self._assemble_timed(name, in_dir)
+				self._print_written(writer.completed())
+				writer.submit(partial(self._write_files, result, name, out_dir))
+		self._print_written(writer.completed())
+
+	def _print_written(self, completed: list[list[str]]):
+		for messages in completed:
+			for message in messages: print(message)
+
+	def _assemble_timed(self, name: str, in_dir: str) -> Result:
+
+		in_file = f"{in_dir}/{name}.asm"
+
 		print()
 		print(f"Ensamblando ({self.name}): {in_file}...")
 		start = perf_counter()
@@ -24,25 +78,30 @@ class AssemblerI:
 		print(f"Listo en {(end - start) * 1000:.2f}ms")
 		print()
 
-		self.write(result, name, out_dir)
+		return result
 
 	def write(self, result: Result, name: str, out_dir: str):
+		for message in self._write_files(result, name, out_dir): print(message)
 
-		out_file = f"{out_dir}/{name}.hex"
+	def _write_files(self, result: Result, name: str, out_dir: str) -> list[str]:
+		"""Escribe las salidas sin imprimir; regresa los mensajes para quien llama."""
+
+		messages = []
 		out_ref  = f"{out_dir}/{name}.ref.txt"
 		out_sim  = f"{out_dir}/{name}.sim.txt"
 
-		with open(out_file, "w") as file:
-			file.write(result.machineCode)
-
-		print(f"Código escrito a {out_file}")
-
-		with open(out_ref, "w") as file:
-			file.write(str(result.referenceTable))
-
-		print(f"Tabla de referencias escrita a {out_ref}")
-
-		with open(out_sim, "w") as file:
-			file.write(str(result.symbolTable))
-
-		print(f"Tabla de símbolos escrita a {out_sim}")
\ No newline at end of file
+		if self.write_code:
+			for format_name in self.formats:
+				output = FORMATS[format_name]
+				out_file = f"{out_dir}/{name}.{output.extension}"
+				output.write(result, out_file, self.chunk_size, self.fsync)
+				messages.append(f"Código escrito a {out_file}")
+
+		if self.write_ref:
+			write_lines(out_ref, result.referenceTable.lines(), self.chunk_size, self.fsync)
+			messages.append(f"Tabla de referencias escrita a {out_ref}")
+
+		if self.write_sim:
+			write_lines(out_sim, result.symbolTable.lines(), self.chunk_size, self.fsync)
+			messages.append(f"Tabla de símbolos escrita a {out_sim}")
+		return messages
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import struct
+from .Result import *
+from .OutputWriter import *
+
+BASE_ADDRESS = 0x1000
+
+class OutputFormat:
+	"""Formato de salida del código de máquina."""
+	extension = ""
+
+	def render(self, result: Result) -> list[bytes | bytearray | memoryview]:
+		raise RuntimeError(f"Render not implemented for {self}")
+
+	def write(self, result: Result, path: str, chunk_size: int = 1 << 16, fsync: bool = False):
+		with open(path, "wb", buffering=chunk_size) as file:
+			file.writelines(self.render(result))
+			if fsync:
+				file.flush()
+				os.fsync(file.fileno())
+
+def entry_point(result: Result) -> int:
+	entry = result.symbolTable.get_address("_start")
+	return entry if entry is not None else BASE_ADDRESS
+
+class HexFormat(OutputFormat):
+	"""Texto hexadecimal, como lo genera cada ensamblador."""
+	extension = "hex"
+
+	def render(self, result: Result):
+		return [result.machineCode.encode("ascii")]
+
+	def write(self, result: Result, path: str, chunk_size: int = 1 << 16, fsync: bool = False):
+		write_lines(path, result.hex_lines(), chunk_size, fsync)
+
+class BinFormat(OutputFormat):
+	"""Imagen binaria plana, cargada en BASE_ADDRESS."""
+	extension = "bin"
+
+	def render(self, result: Result):
+		return [memoryview(result.code)]
+
+class Elf32Format(OutputFormat):
+	"""
+	Ejecutable ELF32 (i386) mínimo: un solo segmento PT_LOAD con toda la
+	imagen en BASE_ADDRESS y punto de entrada en _start.
+	"""
+	extension = "elf"
+
+	EHDR = struct.Struct("<16sHHIIIIIHHHHHH")
+	PHDR = struct.Struct("<IIIIIIII")
+
+	def render(self, result: Result):
+		code = result.code
+		header = bytearray(BASE_ADDRESS)
+		ident = b"\x7fELF" + bytes([1, 1, 1]) + bytes(9)
+		self.EHDR.pack_into(header, 0,
+			ident,
+			2,                          # e_type: ET_EXEC
+			3,                          # e_machine: EM_386
+			1,                          # e_version
+			entry_point(result),        # e_entry
+			self.EHDR.size,             # e_phoff
+			0,                          # e_shoff
+			0,                          # e_flags
+			self.EHDR.size,             # e_ehsize
+			self.PHDR.size,             # e_phentsize
+			1,                          # e_phnum
+			0, 0, 0)                    # sin tabla de secciones
+		self.PHDR.pack_into(header, self.EHDR.size,
+			1,                          # p_type: PT_LOAD
+			BASE_ADDRESS,               # p_offset (alineado con p_vaddr)
+			BASE_ADDRESS,               # p_vaddr
+			BASE_ADDRESS,               # p_paddr
+			len(code),                  # p_filesz
+			len(code),                  # p_memsz
+			7,                          # p_flags: R | W | X
+			0x1000)                     # p_align
+		return [header, memoryview(code)]
+
+class IntelHexFormat(OutputFormat):
+	"""Intel HEX con registros de 16 bytes y dirección de inicio en _start."""
+	extension = "ihx"
+
+	RECORD_SIZE = 16
+
+	def _record(self, kind: int, address: int, data: bytes | memoryview) -> str:
+		record = bytes([len(data), (address >> 8) & 0xFF, address & 0xFF, kind]) + bytes(data)
+		checksum = -sum(record) & 0xFF
+		return f":{record.hex().upper()}{checksum:02X}\n"
+
+	def render(self, result: Result):
+		code = memoryview(result.code)
+		lines = []
+		upper = 0
+		for offset in range(0, len(code), self.RECORD_SIZE):
+			address = BASE_ADDRESS + offset
+			if address >> 16 != upper:
+				upper = address >> 16
+				lines.append(self._record(4, 0, upper.to_bytes(2, "big")))
+			lines.append(self._record(0, address & 0xFFFF, code[offset:offset + self.RECORD_SIZE]))
+		lines.append(self._record(5, 0, entry_point(result).to_bytes(4, "big")))
+		lines.append(self._record(1, 0, b""))
+		return ["".join(lines).encode("ascii")]
+
+# Formatos disponibles por nombre; se pueden registrar más
+FORMATS: dict[str, OutputFormat] = {
+	"hex": HexFormat(),
+	"bin": BinFormat(),
+	"elf": Elf32Format(),
+	"ihex": IntelHexFormat(),
+}
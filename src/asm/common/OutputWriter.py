@@ -0,0 +1,73 @@
+import os
+from queue import Empty, Queue
+from threading import Thread
+from typing import Callable, Iterable
+
+def write_lines(path: str, lines: Iterable[str], chunk_size: int = 1 << 16, fsync: bool = False):
+	"""Escribe 'lines' separadas por '\\n' en bloques de ~chunk_size caracteres."""
+	with open(path, "w", encoding="utf-8", buffering=chunk_size) as file:
+		chunk: list[str] = []
+		size = 0
+		first = True
+		for line in lines:
+			if not first:
+				chunk.append("\n")
+			chunk.append(line)
+			first = False
+			size += len(line) + 1
+			if size >= chunk_size:
+				file.write("".join(chunk))
+				chunk.clear()
+				size = 0
+		if chunk:
+			file.write("".join(chunk))
+		if fsync:
+			file.flush()
+			os.fsync(file.fileno())
+
+class OutputWriter:
+	"""
+	Hilo de fondo que ejecuta trabajos de escritura en orden.
+
+	La cola es acotada: si hay 'max_pending' trabajos esperando,
+	submit() bloquea hasta que el hilo avance (contrapresión). Lo que
+	regresa cada trabajo se recoge con completed() desde el hilo que
+	los envía, p. ej. para imprimir sin mezclar la salida.
+	"""
+
+	def __init__(self, max_pending: int = 2):
+		self.queue: Queue[Callable[[], object] | None] = Queue(max_pending)
+		self.done: Queue[object] = Queue()
+		self.error: BaseException | None = None
+		self.thread = Thread(target=self._work, name="OutputWriter", daemon=True)
+		self.thread.start()
+
+	def submit(self, job: Callable[[], object]):
+		if self.error is not None: raise self.error
+		self.queue.put(job)
+
+	def completed(self) -> list[object]:
+		"""Resultados de los trabajos terminados desde la última llamada, en orden."""
+		results = []
+		while True:
+			try: results.append(self.done.get_nowait())
+			except Empty: return results
+
+	def close(self):
+		self.queue.put(None)
+		self.thread.join()
+		if self.error is not None: raise self.error
+
+	def _work(self):
+		while True:
+			job = self.queue.get()
+			if job is None: return
+			if self.error is not None: continue
+			try: self.done.put(job())
+			except BaseException as e: self.error = e
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
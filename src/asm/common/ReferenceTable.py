@@ -1,29 +1,48 @@
+from .SymbolInterner import *
+
 class ReferenceTable:
-    def __init__(self):
-        # Diccionario que mapea: Nombre del Símbolo -> Lista de direcciones donde se usa
-        self.references: dict[str, list[int]] = {}
+    def __init__(self, interner: SymbolInterner | None = None):
+        self.interner = interner if interner is not None else SymbolInterner()
+        # Lista indexada por id de símbolo -> Lista de direcciones donde se usa
+        self.usages: list[list[int] | None] = []
 
     def add_usage(self, name: str, address: int):
         """Registra que el símbolo 'name' fue usado en la dirección 'address'."""
-        if name not in self.references:
-            self.references[name] = []
-        self.references[name].append(address)
+        self.add_usage_id(self.interner.intern(name), address)
 
-    def __str__(self):
-        if not self.references:
-            return "Tabla de referencias: (Vacía)"
+    def add_usage_id(self, id: int, address: int):
+        # Un id negativo (p. ej. un registro) indexaría desde el final
+        if id < 0: raise ValueError(f"Id de símbolo inválido: {id}")
+        usages = self.usages
+        missing = id + 1 - len(usages)
+        if missing > 0: usages.extend([None] * missing)
+        if usages[id] is None: usages[id] = [address]
+        else: usages[id].append(address)
+
+    @property
+    def references(self) -> dict[str, list[int]]:
+        names = self.interner.names
+        return {names[id]: addresses for id, addresses in enumerate(self.usages) if addresses}
 
-        lines = ["Tabla de referencias:"]
-        lines.append("-" * 80)
-        lines.append(f"{'Símbolo':<20} {'Direcciones de uso (Hex)'}")
-        lines.append("-" * 80)
+    def lines(self):
+        """Genera la tabla línea por línea, sin construir un solo string."""
+        references = self.references
+        if not references:
+            yield "Tabla de referencias: (Vacía)"
+            return
 
-        for name, addresses in sorted(self.references.items()):
+        yield "Tabla de referencias:"
+        yield "-" * 80
+        yield f"{'Símbolo':<20} {'Direcciones de uso (Hex)'}"
+        yield "-" * 80
+
+        for name, addresses in sorted(references.items()):
             # Formateamos las direcciones como una lista separada por comas: 0x00001000, 0x00001005...
             addr_str = ", ".join([f"0x{addr:08X}" for addr in addresses])
-            lines.append(f"{name:<20} {addr_str}")
+            yield f"{name:<20} {addr_str}"
+
+        yield "-" * 80
+        yield f"Total: {len(references)} símbolos referenciados"
 
-        lines.append("-" * 80)
-        lines.append(f"Total: {len(self.references)} símbolos referenciados")
-        
-        return "\n".join(lines)
\ No newline at end of file
+    def __str__(self):
+        return "\n".join(self.lines())
@@ -1,3 +1,5 @@
+from array import array
+from typing import Iterator
 from .ReferenceTable import *
 from .SymbolTable import *
 
@@ -5,8 +7,55 @@ class Result:
 	def __init__(self, 
 			symbolTable: SymbolTable, 
 			referenceTable: ReferenceTable, 
-			machineCode: str):
+			machineCode: str | None,
+			code: bytes | bytearray | None = None,
+			sizes: array | None = None):
 
 		self.symbolTable = symbolTable
 		self.referenceTable = referenceTable
-		self.machineCode = machineCode
\ No newline at end of file
+		self._machineCode = machineCode
+		self._code = code
+		# Tamaño de cada instrucción en 'code': el texto se genera solo si se pide
+		self._sizes = sizes
+		# Reporte de código eliminado, si el ensamblador lo calcula
+		self.elimination = None
+		# Aciertos y fallos de las cachés de lectura ('lines', 'operands')
+		self.cache_stats = None
+
+	@property
+	def machineCode(self) -> str:
+		"""Código como texto hexadecimal, una instrucción por línea."""
+		if self._machineCode is None:
+			self._machineCode = "\n".join(self.hex_lines())
+		return self._machineCode
+
+	def hex_lines(self) -> Iterator[str]:
+		"""Líneas de machineCode, sin construir el texto completo si se tienen los bytes."""
+		if self._machineCode is not None or self._sizes is None:
+			yield self.machineCode
+			return
+		code = memoryview(self._code)
+		start = 0
+		for size in self._sizes:
+			yield code[start:start + size].hex(" ").upper()
+			start += size
+
+	@property
+	def code(self) -> bytes | bytearray:
+		"""Código de máquina como bytes (se obtiene del texto si no se dio)."""
+		if self._code is None:
+			self._code = bytes.fromhex(self.machineCode)
+		return self._code
+
+	@property
+	def view(self) -> memoryview:
+		"""Vista de solo lectura del código, sin copiarlo."""
+		return memoryview(self.code).toreadonly()
+
+	@property
+	def symbols(self) -> dict[str, int]:
+		return self.symbolTable.symbols
+
+	@property
+	def references(self) -> dict[str, list[int]]:
+		return self.referenceTable.references
@@ -0,0 +1,27 @@
+
+class SymbolInterner:
+	"""Asigna a cada nombre de símbolo un id entero denso (0, 1, 2, ...)."""
+
+	def __init__(self):
+		self.ids: dict[str, int] = {}
+		self.names: list[str] = []
+
+	def intern(self, name: str) -> int:
+		id = self.ids.get(name)
+		if id is None:
+			id = len(self.names)
+			self.ids[name] = id
+			self.names.append(name)
+		return id
+
+	def lookup(self, name: str) -> int:
+		return self.ids.get(name, -1)
+
+	def name(self, id: int) -> str:
+		return self.names[id]
+
+	def __len__(self):
+		return len(self.names)
+
+	def __repr__(self):
+		return f"SymbolInterner({len(self.names)} symbols)"
@@ -1,33 +1,61 @@
+from array import array
+from .SymbolInterner import *
 
 class SymbolTable:
-	def __init__(self):
-		self.symbols: dict[str, int] = {}
+	def __init__(self, interner: SymbolInterner | None = None):
+		self.interner = interner if interner is not None else SymbolInterner()
+		# Dirección de cada símbolo, indexada por id (-1 = no definido)
+		self.addresses = array('q')
 	
 	def add_symbol(self, name: str, address: int):
-		self.symbols[name] = address
+		self.add_symbol_id(self.interner.intern(name), address)
+	
+	def add_symbol_id(self, id: int, address: int):
+		# Un id negativo (p. ej. un registro) indexaría desde el final
+		if id < 0: raise ValueError(f"Id de símbolo inválido: {id}")
+		missing = id + 1 - len(self.addresses)
+		if missing > 0: self.addresses.extend([-1] * missing)
+		self.addresses[id] = address
 	
 	def get_address(self, name: str) -> int | None:
-		return self.symbols.get(name)
+		return self.get_address_id(self.interner.lookup(name))
+	
+	def get_address_id(self, id: int) -> int | None:
+		if 0 <= id < len(self.addresses) and self.addresses[id] >= 0:
+			return self.addresses[id]
+		return None
 	
 	def has_symbol(self, name: str) -> bool:
-		return name in self.symbols
+		return self.get_address(name) is not None
 	
-	def __str__(self):
-		if not self.symbols:
-			return "--"
-		
-		lines = ["Tabla de símbolos:"]
-		lines.append("-" * 40)
-		lines.append(f"{'Símbolo':<20} {'Dirección':>10}")
-		lines.append("-" * 40)
+	def has_symbol_id(self, id: int) -> bool:
+		return self.get_address_id(id) is not None
+	
+	@property
+	def symbols(self) -> dict[str, int]:
+		names = self.interner.names
+		return {names[id]: address for id, address in enumerate(self.addresses) if address >= 0}
+	
+	def lines(self):
+		"""Genera la tabla línea por línea, sin construir un solo string."""
+		symbols = self.symbols
+		if not symbols:
+			yield "--"
+			return
 		
-		for name, address in sorted(self.symbols.items()):
-			lines.append(f"{name:<20} 0x{address:08X}")
+		yield "Tabla de símbolos:"
+		yield "-" * 40
+		yield f"{'Símbolo':<20} {'Dirección':>10}"
+		yield "-" * 40
 		
-		lines.append("-" * 40)
-		lines.append(f"Total: {len(self.symbols)} símbolos")
+		for name, address in sorted(symbols.items()):
+			yield f"{name:<20} 0x{address:08X}"
 		
-		return "\n".join(lines)
+		yield "-" * 40
+		yield f"Total: {len(symbols)} símbolos"
+	
+	def __str__(self):
+		return "\n".join(self.lines())
 	
 	def __repr__(self):
-		return f"SymbolTable({len(self.symbols)} symbols)"
\ No newline at end of file
+		return f"SymbolTable({len(self.symbols)} symbols)"
@@ -1,5 +1,8 @@
+from .SymbolInterner import *
 from .ReferenceTable import *
+from .OutputWriter import *
 from .Result import *
+from .OutputFormat import *
 from .SymbolTable import *
 from .AssemblerI import *
 from .Tracker import *
@@ -0,0 +1,47 @@
+from typing import Iterable
+
+# Secuencias NOP de varios bytes recomendadas por Intel, indexadas por tamaño
+NOPS: list[bytes] = [
+	b"",
+	bytes([0x90]),
+	bytes([0x66, 0x90]),
+	bytes([0x0F, 0x1F, 0x00]),
+	bytes([0x0F, 0x1F, 0x40, 0x00]),
+	bytes([0x0F, 0x1F, 0x44, 0x00, 0x00]),
+	bytes([0x66, 0x0F, 0x1F, 0x44, 0x00, 0x00]),
+	bytes([0x0F, 0x1F, 0x80, 0x00, 0x00, 0x00, 0x00]),
+	bytes([0x0F, 0x1F, 0x84, 0x00, 0x00, 0x00, 0x00, 0x00]),
+	bytes([0x66, 0x0F, 0x1F, 0x84, 0x00, 0x00, 0x00, 0x00, 0x00]),
+]
+MAX_NOP = len(NOPS) - 1
+
+# Saltos que pueden cerrar un ciclo hacia una etiqueta anterior
+LOOP_JUMPS = {'jmp', 'loop', 'je', 'jne', 'jz', 'jnz', 'jg', 'jge', 'jl', 'jle', 'ja', 'jae', 'jb', 'jbe'}
+
+def align_padding(address: int, boundary: int) -> int:
+	"""Bytes de relleno para llevar 'address' al siguiente múltiplo de 'boundary'."""
+	return -address % boundary if boundary > 1 else 0
+
+def nop_padding(count: int) -> bytes:
+	"""Relleno de 'count' bytes con el menor número de instrucciones NOP."""
+	full, rest = divmod(count, MAX_NOP)
+	return NOPS[MAX_NOP] * full + NOPS[rest]
+
+def find_loop_heads(lines: Iterable[str]) -> set[str]:
+	"""
+	Etiquetas que son destino de un salto posterior a su definición
+	(cabezas de ciclo). Es un recorrido léxico, sin ensamblar.
+	"""
+	defined = set()
+	heads = set()
+	for line in lines:
+		code = line.split(';', 1)[0].strip()
+		if not code: continue
+		if code.endswith(':'):
+			defined.add(code[:-1])
+			continue
+		tokens = code.split(None, 1)
+		if len(tokens) == 2 and tokens[0].lower() in LOOP_JUMPS:
+			target = tokens[1].strip()
+			if target in defined: heads.add(target)
+	return heads
@@ -0,0 +1,30 @@
+from asm.common import *
+from .ParseCache import *
+from .Parser import *
+
+class AssemblyContext:
+	"""
+	Estado de un solo ensamblado: símbolos, referencias, dirección
+	actual, internador y cachés de lectura. Los ensambladores no guardan
+	estado propio, así que una misma instancia puede usarse desde varios
+	hilos mientras cada llamada cree su propio contexto.
+
+	'parser' lee las líneas con el internador y las cachés del contexto.
+	"""
+
+	def __init__(self, cache_size: int = 4096, symbol_table: SymbolTable | None = None):
+		self.interner = symbol_table.interner if symbol_table is not None else SymbolInterner()
+		self.symbol_table = symbol_table if symbol_table is not None else SymbolTable(self.interner)
+		self.ref_table = ReferenceTable(self.interner)
+		self.current_address = 0x1000
+		# Cachés LRU por línea normalizada y por operando (0 = sin caché)
+		self.line_cache = ParseCache(cache_size) if cache_size > 0 else None
+		self.operand_cache = ParseCache(cache_size) if cache_size > 0 else None
+		self.parser = InstructionParser(self.interner, self.line_cache, self.operand_cache)
+
+	def cache_stats(self) -> dict[str, CacheStats]:
+		"""Aciertos y fallos de las cachés de lectura ('lines' y 'operands')."""
+		return {
+			'lines': self.line_cache.stats() if self.line_cache else CacheStats(),
+			'operands': self.operand_cache.stats() if self.operand_cache else CacheStats(),
+		}
\ No newline at end of file
@@ -3,8 +3,10 @@ class Expression:
     self.type = type
 
 class IdentifierExpression(Expression):
-  def __init__(self, name: str):
+  def __init__(self, name: str, id: int = -1, reg: int | None = None):
     self.name = name
+    self.id = id
+    self.reg = reg
 
 class IntegerExpression(Expression):
   def __init__(self, value: int):
@@ -116,64 +118,79 @@ class IntInstruction(Instruction):
     self.imm8 = imm8
 
 class JmpInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JeInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JneInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JleInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JlInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JzInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JnzInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JaInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JaeInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JbInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JbeInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JgInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class JgeInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class CallInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class LoopInstruction(Instruction):
-  def __init__(self, label: str):
+  def __init__(self, label: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
 
 class RetInstruction(Instruction):
   def __init__(self):
@@ -189,12 +206,17 @@ class DirectiveInstruction(Instruction):
     self.operands = operands
 
 class DataDeclarationInstruction(Instruction):
-  def __init__(self, label: str, directive: str, value: str):
+  def __init__(self, label: str, directive: str, value: str, label_id: int = -1):
     self.label = label
+    self.label_id = label_id
     self.directive = directive
     self.value = value
 
 class ImulTwoInstruction(Instruction):
   def __init__(self, dest: Expression, src: Expression):
     self.dest = dest
-    self.src = src
\ No newline at end of file
+    self.src = src
+
+class AlignInstruction(Instruction):
+  def __init__(self, boundary: int):
+    self.boundary = boundary
\ No newline at end of file
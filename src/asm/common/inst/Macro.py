@@ -0,0 +1,196 @@
+import copy
+from typing import Iterable, Iterator
+from .Instruction import *
+from .Parser import *
+
+# Un elemento ya leído: (id de etiqueta o -1, instrucción o None)
+Parsed = tuple[int, Instruction | None]
+
+class Macro:
+	"""
+	Macro definida con %macro/%endmacro. El cuerpo se lee una sola vez
+	a una plantilla de nodos del IR; expandirla solo sustituye operandos.
+	"""
+
+	def __init__(self, name: str, params: int):
+		self.name = name
+		self.params = params
+		# ('label', nombre) | ('data', nombre, directiva, valor) |
+		# ('inst', instrucción, atributos con parámetros) | ('macro', macro, argumentos)
+		self.template: list[tuple] = []
+
+def _is_placeholder(name: str) -> bool:
+	return name.startswith('%')
+
+def _has_placeholder(value) -> bool:
+	if isinstance(value, MemoryExpression): value = value.address
+	return isinstance(value, IdentifierExpression) and _is_placeholder(value.name)
+
+class _Expansion:
+	"""Argumentos y etiquetas locales de una expansión."""
+	__slots__ = ('name', 'args', 'labels', 'prefix')
+
+	def __init__(self, name: str, args: list[Expression], number: int):
+		self.name = name
+		self.args = args
+		self.labels: dict[str, IdentifierExpression] = {}
+		self.prefix = f"..@{number}."
+
+class MacroProcessor:
+	"""
+	Etapa previa a InstructionParser. Las líneas fuera de macros pasan
+	sin cambio (como texto); las invocaciones se expanden a elementos
+	(id de etiqueta, instrucción) como los que regresa Parser.parseLine.
+
+	Dentro del cuerpo, %1..%N son los parámetros y %%nombre es una
+	etiqueta local, distinta en cada expansión.
+	"""
+
+	def __init__(self, parser: InstructionParser):
+		self.parser = parser
+		self.macros: dict[str, Macro] = {}
+		self.expansions = 0
+
+	def process(self, lines: Iterable[str]) -> Iterator[str | Parsed]:
+		for _, item in self.processWithSource(lines): yield item
+
+	def processWithSource(self, lines: Iterable[str]) -> Iterator[tuple[str, str | Parsed]]:
+		"""Como process, junto con la línea de origen (la invocación, en las expansiones)."""
+		macros = self.macros
+		defining: Macro | None = None
+		body: list[str] = []
+
+		for line in lines:
+			code = line.split(';', 1)[0].strip()
+			if code.startswith('%'):
+				tokens = code.split()
+				directive = tokens[0].lower()
+				if directive == '%macro':
+					if defining is not None: raise ValueError(f"Macro anidada en {defining.name}: {code}")
+					if len(tokens) != 3 or not tokens[2].isdigit(): raise ValueError(f"Se esperaba '%macro nombre N': {code}")
+					defining, body = Macro(tokens[1], int(tokens[2])), []
+					continue
+				if directive == '%endmacro':
+					if defining is None: raise ValueError("%endmacro sin %macro")
+					self._compile(defining, body)
+					macros[defining.name] = defining
+					defining = None
+					continue
+
+			if defining is not None:
+				if code: body.append(code)
+				continue
+
+			if macros and code:
+				macro = macros.get(code.split(None, 1)[0])
+				if macro is not None:
+					args = [self.parser._parseExpression(arg) for arg in self._splitArgs(code[len(macro.name):])]
+					for item in self.expand(macro, args): yield line, item
+					continue
+
+			yield line, line
+
+		if defining is not None: raise ValueError(f"Falta %endmacro para {defining.name}")
+
+	def expand(self, macro: Macro, args: list[Expression]) -> Iterator[Parsed]:
+		if len(args) != macro.params:
+			raise ValueError(f"La macro {macro.name} espera {macro.params} argumentos, recibió {len(args)}")
+		self.expansions += 1
+		scope = _Expansion(macro.name, args, self.expansions)
+
+		for item in macro.template:
+			match item[0]:
+				case 'label':
+					label = self._resolveLabel(self._resolve(item[1], scope), item[1], scope)
+					yield label.id, None
+				case 'data':
+					label = self._resolveLabel(self._resolve(item[1], scope), item[1], scope)
+					value = item[3]
+					if _is_placeholder(value):
+						arg = self._resolve(value, scope)
+						if isinstance(arg, IntegerExpression): value = str(arg.value)
+						else: value = self._resolveLabel(arg, value, scope).name
+					yield label.id, DataDeclarationInstruction(label.name, item[2], value, label.id)
+				case 'inst':
+					inst, fields = item[1], item[2]
+					if fields:
+						inst = copy.copy(inst)
+						for field in fields: self._substitute(inst, field, scope)
+					yield -1, inst
+				case 'macro':
+					yield from self.expand(item[1], [self._resolveExpr(arg, scope) for arg in item[2]])
+
+	# --- Plantillas ---
+
+	def _compile(self, macro: Macro, body: list[str]):
+		parser = self.parser
+		template = macro.template
+		for code in body:
+			tokens = code.split()
+			if code.endswith(':'):
+				template.append(('label', code[:-1]))
+			elif tokens[0].lower() in ['section', 'global']:
+				continue
+			elif len(tokens) >= 2 and tokens[1].lower() in ['dd', 'dw', 'db']:
+				template.append(('data', tokens[0], tokens[1].lower(), ' '.join(tokens[2:])))
+			elif tokens[0] in self.macros:
+				nested = self.macros[tokens[0]]
+				template.append(('macro', nested, [parser._parseExpression(arg) for arg in self._splitArgs(code[len(nested.name):])]))
+			else:
+				inst = parser.parseInstruction(code)
+				fields = [name for name, value in vars(inst).items()
+					if _has_placeholder(value) or (name == 'label' and _is_placeholder(value))]
+				template.append(('inst', inst, fields))
+
+	def _splitArgs(self, text: str) -> list[str]:
+		args = []
+		depth = 0
+		start = 0
+		for i, c in enumerate(text):
+			if c == '[': depth += 1
+			elif c == ']': depth -= 1
+			elif c == ',' and depth == 0:
+				args.append(text[start:i].strip())
+				start = i + 1
+		if text.strip(): args.append(text[start:].strip())
+		return args
+
+	# --- Sustitución ---
+
+	def _resolve(self, name: str, scope: _Expansion) -> Expression:
+		"""Regresa la expresión de un nombre del cuerpo (parámetro, local o normal)."""
+		if name.startswith('%%'):
+			label = scope.labels.get(name)
+			if label is None:
+				label = self.parser._parseIdentifier(scope.prefix + name[2:])
+				scope.labels[name] = label
+			return label
+		if name.startswith('%') and name[1:].isdigit():
+			index = int(name[1:])
+			if not 1 <= index <= len(scope.args): raise ValueError(f"Parámetro fuera de rango: {name}")
+			return scope.args[index - 1]
+		return self.parser._parseIdentifier(name)
+
+	def _resolveExpr(self, expr: Expression, scope: _Expansion) -> Expression:
+		if isinstance(expr, MemoryExpression) and _has_placeholder(expr):
+			name = expr.address.name
+			return MemoryExpression(self._resolveLabel(self._resolve(name, scope), name, scope))
+		if isinstance(expr, IdentifierExpression) and _is_placeholder(expr.name):
+			return self._resolve(expr.name, scope)
+		return expr
+
+	def _resolveLabel(self, expr: Expression, name: str, scope: _Expansion) -> IdentifierExpression:
+		"""Valida que el argumento usado como etiqueta o dirección sea un identificador y no un registro."""
+		if not isinstance(expr, IdentifierExpression):
+			raise ValueError(f"Macro {scope.name}: se esperaba una etiqueta en {name}, se recibió {type(expr).__name__}")
+		if expr.reg is not None:
+			raise ValueError(f"Macro {scope.name}: se esperaba una etiqueta en {name}, se recibió el registro {expr.name}")
+		return expr
+
+	def _substitute(self, inst: Instruction, field: str, scope: _Expansion):
+		value = getattr(inst, field)
+		if field == 'label':
+			label = self._resolveLabel(self._resolve(value, scope), value, scope)
+			inst.label, inst.label_id = label.name, label.id
+		else:
+			setattr(inst, field, self._resolveExpr(value, scope))
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+
+class CacheStats:
+	"""Aciertos y fallos de una caché al terminar un ensamblado."""
+	__slots__ = ('hits', 'misses')
+
+	def __init__(self, hits: int = 0, misses: int = 0):
+		self.hits = hits
+		self.misses = misses
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def __repr__(self):
+		return f"CacheStats(hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.2%})"
+
+class ParseCache:
+	"""
+	Caché LRU acotada de nodos del IR.
+
+	Los nodos guardados se comparten entre todas las líneas que los
+	producen, por lo que nunca deben modificarse después de crearse.
+	Una capacidad de 0 desactiva la caché.
+	"""
+
+	def __init__(self, capacity: int = 4096):
+		self.capacity = capacity
+		self.entries: OrderedDict[str, object] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key: str):
+		node = self.entries.get(key)
+		if node is None:
+			self.misses += 1
+			return None
+		self.entries.move_to_end(key)
+		self.hits += 1
+		return node
+
+	def put(self, key: str, node):
+		if self.capacity <= 0: return
+		self.entries[key] = node
+		if len(self.entries) > self.capacity:
+			self.entries.popitem(last=False)
+
+	def clear(self):
+		self.entries.clear()
+
+	def stats(self) -> CacheStats:
+		return CacheStats(self.hits, self.misses)
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __repr__(self):
+		return f"ParseCache({len(self.entries)}/{self.capacity}, hits={self.hits}, misses={self.misses})"
@@ -1,9 +1,32 @@
 from asm.common import *
 from .Instruction import *
+from .Registers import *
+from .ParseCache import *
+from .Alignment import *
 
 class InstructionParser:
+	"""
+	Lee texto a nodos del IR. No guarda estado propio: el internador y
+	las cachés (por línea normalizada y por operando) son del dueño,
+	normalmente un AssemblyContext. Sin cachés se lee cada vez.
+	"""
+	
+	def __init__(self, interner: SymbolInterner | None = None,
+			lineCache: ParseCache | None = None, operandCache: ParseCache | None = None):
+		self.interner = interner if interner is not None else SymbolInterner()
+		self.lineCache = lineCache
+		self.operandCache = operandCache
 	
 	def parseInstruction(self, code: str) -> Instruction:
+		cache = self.lineCache
+		if cache is None: return self._parseInstruction(code)
+		inst = cache.get(code)
+		if inst is None:
+			inst = self._parseInstruction(code)
+			cache.put(code, inst)
+		return inst
+	
+	def _parseInstruction(self, code: str) -> Instruction:
 		tokens = code.split()
 		cmd = tokens[0].lower()
 		ops = ' '.join(tokens[1:]) if len(tokens) > 1 else ""
@@ -26,26 +49,33 @@ class InstructionParser:
 			case "movzx": d, s = self._parseTwoOperands(ops); return MovzxInstruction(d, s)
 			case "push": return PushInstruction(self._parseExpression(ops))
 			case "pop": return PopInstruction(self._parseExpression(ops))
-			case "call": return CallInstruction(ops.strip())
+			case "call": return CallInstruction(*self._parseLabel(ops))
 			case "ret": return RetInstruction()
 			case "int": return IntInstruction(self._parseExpression(ops))
 			case "nop": return NopInstruction()
-			case "jmp": return JmpInstruction(ops.strip())
-			case "loop": return LoopInstruction(ops.strip())
-			case "je": return JeInstruction(ops.strip())
-			case "jne": return JneInstruction(ops.strip())
-			case "jz": return JzInstruction(ops.strip())
-			case "jnz": return JnzInstruction(ops.strip())
-			case "jg": return JgInstruction(ops.strip())
-			case "jge": return JgeInstruction(ops.strip())
-			case "jl": return JlInstruction(ops.strip())
-			case "jle": return JleInstruction(ops.strip())
-			case "ja": return JaInstruction(ops.strip())
-			case "jae": return JaeInstruction(ops.strip())
-			case "jb": return JbInstruction(ops.strip())
-			case "jbe": return JbeInstruction(ops.strip())
+			case "align": return AlignInstruction(self._parseAlignment(ops))
+			case "jmp": return JmpInstruction(*self._parseLabel(ops))
+			case "loop": return LoopInstruction(*self._parseLabel(ops))
+			case "je": return JeInstruction(*self._parseLabel(ops))
+			case "jne": return JneInstruction(*self._parseLabel(ops))
+			case "jz": return JzInstruction(*self._parseLabel(ops))
+			case "jnz": return JnzInstruction(*self._parseLabel(ops))
+			case "jg": return JgInstruction(*self._parseLabel(ops))
+			case "jge": return JgeInstruction(*self._parseLabel(ops))
+			case "jl": return JlInstruction(*self._parseLabel(ops))
+			case "jle": return JleInstruction(*self._parseLabel(ops))
+			case "ja": return JaInstruction(*self._parseLabel(ops))
+			case "jae": return JaeInstruction(*self._parseLabel(ops))
+			case "jb": return JbInstruction(*self._parseLabel(ops))
+			case "jbe": return JbeInstruction(*self._parseLabel(ops))
 			case _: return NopInstruction()
 	
+	def _parseAlignment(self, text: str) -> int:
+		boundary = self._parseOperand(text)
+		if not isinstance(boundary, IntegerExpression) or boundary.value <= 0 or boundary.value & (boundary.value - 1):
+			raise ValueError(f"Alineación inválida (debe ser potencia de 2): {text}")
+		return boundary.value
+	
 	def _parseTwoOperands(self, text: str):
 		comma = -1
 		depth = 0
@@ -57,10 +87,30 @@ class InstructionParser:
 		return self._parseExpression(text[:comma]), self._parseExpression(text[comma+1:])
 	
 	def _parseExpression(self, expr: str):
+		cache = self.operandCache
+		if cache is None: return self._parseOperand(expr)
+		node = cache.get(expr)
+		if node is None:
+			node = self._parseOperand(expr)
+			cache.put(expr, node)
+		return node
+	
+	def _parseOperand(self, expr: str):
 		expr = expr.strip()
-		if expr.startswith('[') and expr.endswith(']'): return MemoryExpression(IdentifierExpression(expr[1:-1].strip()))
+		if expr.startswith('[') and expr.endswith(']'): return MemoryExpression(self._parseIdentifier(expr[1:-1].strip()))
 		try: 
 			if expr.upper().endswith('H'): return IntegerExpression(int(expr[:-1], 16))
 			if expr.upper().startswith('0X'): return IntegerExpression(int(expr, 16))
 			return IntegerExpression(int(expr))
-		except: return IdentifierExpression(expr)
\ No newline at end of file
+		except: return self._parseIdentifier(expr)
+	
+	def _parseIdentifier(self, name: str) -> IdentifierExpression:
+		# Los registros no son símbolos: solo se internan los demás nombres
+		reg = REGISTERS.get(name.lower())
+		if reg is not None: return IdentifierExpression(name, -1, reg)
+		id = self.interner.intern(name)
+		return IdentifierExpression(self.interner.names[id], id)
+	
+	def _parseLabel(self, text: str) -> tuple[str, int]:
+		id = self.interner.intern(text.strip())
+		return self.interner.names[id], id
\ No newline at end of file
@@ -0,0 +1,5 @@
+REGISTERS = {
+    'eax': 0, 'ecx': 1, 'edx': 2, 'ebx': 3, 'esp': 4, 'ebp': 5, 'esi': 6, 'edi': 7,
+    'ax': 0,  'cx': 1,  'dx': 2,  'bx': 3,  'sp': 4,  'bp': 5,  'si': 6,  'di': 7,
+    'al': 0,  'cl': 1,  'dl': 2,  'bl': 3,  'ah': 4,  'ch': 5,  'dh': 6,  'bh': 7
+}
@@ -1,2 +1,7 @@
+from .Registers import *
+from .ParseCache import *
+from .Alignment import *
 from .Parser import *
-from .Instruction import *
\ No newline at end of file
+from .AssemblyContext import *
+from .Instruction import *
+from .Macro import *
\ No newline at end of file
@@ -0,0 +1,209 @@
+from multiprocessing import Pool
+from time import perf_counter
+from asm.common import *
+from asm.common.inst import *
+from asm.one_pass import *
+from asm.two_pass.two_pass import TwoPassAssembler
+from .Generator import *
+
+class Mismatch:
+	"""Diferencia entre ensambladores: tipo ('excepción', 'código', 'símbolos') y detalle."""
+
+	def __init__(self, kind: str, detail: str):
+		self.kind = kind
+		self.detail = detail
+
+	def __str__(self):
+		return f"{self.kind}: {self.detail}"
+
+class Failure:
+	def __init__(self, seed: int, mismatch: Mismatch, program: list[str]):
+		self.seed = seed
+		self.mismatch = mismatch
+		self.program = program
+		# Casos que se redujeron a la misma forma
+		self.count = 1
+
+def _operand_shape(operand: str) -> str:
+	operand = operand.strip()
+	if operand.startswith('['): return 'm'
+	if operand.lower() in REGISTERS: return 'r'
+	try:
+		int(operand, 0)
+		return 'i'
+	except ValueError:
+		return 'l'
+
+def program_shape(lines: list[str]) -> tuple[str, ...]:
+	"""
+	Forma de un programa: cada línea con su mnemónico y el tipo de cada
+	operando (r registro, m memoria, i inmediato, l etiqueta), sin
+	nombres ni valores. Dos reproductores con la misma forma suelen ser
+	el mismo error.
+	"""
+	shape = []
+	for line in lines:
+		code = line.split(';', 1)[0].strip()
+		if not code: continue
+		tokens = code.split(None, 1)
+		if code.endswith(':'): shape.append('l:')
+		elif len(tokens) == 2 and tokens[1].split(None, 1)[0].lower() in ['db', 'dw', 'dd']:
+			shape.append(f"l {tokens[1].split(None, 1)[0].lower()} i")
+		elif tokens[0].lower() in ['section', 'global']: shape.append(code)
+		else:
+			operands = ', '.join(map(_operand_shape, tokens[1].split(','))) if len(tokens) == 2 else ''
+			shape.append(f"{tokens[0].lower()} {operands}".strip())
+	return tuple(shape)
+
+class DifferentialChecker:
+	"""Ensambla un programa con ambos motores y compara la salida normalizada."""
+
+	def __init__(self, cache_size: int = 4096):
+		self.one_pass = OnePassAssembler(cache_size)
+		self.two_pass = TwoPassAssembler(cache_size)
+
+	def compare(self, lines: list[str]) -> Mismatch | None:
+		one, one_error = self._assemble(self.one_pass, lines)
+		two, two_error = self._assemble(self.two_pass, lines)
+		if one_error or two_error:
+			if one_error and two_error: return None
+			return Mismatch('excepción', f"1 pasada: {one_error or 'ok'} / 2 pasadas: {two_error or 'ok'}")
+
+		# El texto hex difiere en separadores; se comparan los bytes
+		one_code, two_code = bytes(one.code), bytes(two.code)
+		if one_code != two_code:
+			offset = next((i for i, (a, b) in enumerate(zip(one_code, two_code)) if a != b), min(len(one_code), len(two_code)))
+			return Mismatch('código', f"difieren desde el byte {offset} (0x{BASE_ADDRESS + offset:08X}); "
+				f"tamaños {len(one_code)} / {len(two_code)}")
+
+		one_symbols, two_symbols = one.symbols, two.symbols
+		if one_symbols != two_symbols:
+			names = sorted(name for name in one_symbols.keys() | two_symbols.keys() if one_symbols.get(name) != two_symbols.get(name))
+			shown = ", ".join(f"{name} {self._address(one_symbols, name)}/{self._address(two_symbols, name)}" for name in names[:5])
+			return Mismatch('símbolos', shown)
+		return None
+
+	def shrink(self, lines: list[str], kind: str | None = None) -> list[str]:
+		"""
+		Reduce el programa quitando bloques de líneas mientras siga
+		fallando con el mismo tipo de diferencia, o con cualquiera si
+		'kind' es None (delta debugging).
+		"""
+		parts = 2
+		while len(lines) >= 2:
+			chunk = -(-len(lines) // parts)
+			for start in range(0, len(lines), chunk):
+				candidate = lines[:start] + lines[start + chunk:]
+				mismatch = self.compare(candidate) if candidate else None
+				if mismatch is not None and kind in (None, mismatch.kind):
+					lines = candidate
+					parts = max(parts - 1, 2)
+					break
+			else:
+				if parts >= len(lines): break
+				parts = min(len(lines), parts * 2)
+		return lines
+
+	def _assemble(self, assembler: AssemblerI, lines: list[str]) -> tuple[Result | None, str | None]:
+		# assemble_source es estricto en ambos motores: un error no se confunde con código vacío
+		try:
+			return assembler.assemble_source(lines), None
+		except Exception as e:
+			return None, f"{type(e).__name__}: {e}"
+
+	def _address(self, symbols: dict[str, int], name: str) -> str:
+		address = symbols.get(name)
+		return f"0x{address:08X}" if address is not None else "-"
+
+# Estado de cada proceso del pool: se crea una vez por proceso
+_worker: tuple[ProgramGenerator, DifferentialChecker] | None = None
+
+def _init_worker(size: int, data: int, labels: int):
+	global _worker
+	_worker = (ProgramGenerator(size, data, labels), DifferentialChecker())
+
+def _run_batch(seeds: range) -> tuple[int, list[tuple[int, str]]]:
+	generator, checker = _worker
+	failures = []
+	for seed in seeds:
+		mismatch = checker.compare(generator.generate(seed))
+		if mismatch is not None: failures.append((seed, mismatch.kind))
+	return len(seeds), failures
+
+class FuzzReport:
+	def __init__(self, programs: int, failed: int, failures: list[Failure], elapsed: float):
+		self.programs = programs
+		self.failed = failed
+		self.failures = failures
+		self.elapsed = elapsed
+
+	@property
+	def rate(self) -> float:
+		return self.programs / self.elapsed if self.elapsed > 0 else 0.0
+
+	def lines(self):
+		yield f"Programas: {self.programs} en {self.elapsed:.2f}s ({self.rate:.0f}/s)"
+		yield f"Diferencias: {self.failed}"
+		for failure in self.failures:
+			yield ""
+			yield f"Semilla {failure.seed} -> {failure.mismatch} ({failure.count} casos con esta forma)"
+			yield "-" * 40
+			yield from failure.program
+			yield "-" * 40
+
+	def __str__(self):
+		return "\n".join(self.lines())
+
+# Casos que se reducen, como máximo, por cada reproductor distinto pedido
+SHRINK_ATTEMPTS = 10
+
+class DifferentialFuzzer:
+	"""
+	Genera programas aleatorios, los ensambla con OnePassAssembler y
+	TwoPassAssembler en un pool de procesos, y reduce los primeros
+	casos que difieren a un reproductor mínimo.
+	"""
+
+	def __init__(self, size: int = 30, data: int = 4, labels: int = 4, workers: int | None = None, batch: int = 256):
+		self.size = size
+		self.data = data
+		self.labels = labels
+		self.workers = workers
+		self.batch = batch
+
+	def run(self, count: int, seed: int = 0, max_shrink: int = 5) -> FuzzReport:
+		batches = [range(start, min(start + self.batch, seed + count)) for start in range(seed, seed + count, self.batch)]
+		found: list[tuple[int, str]] = []
+		programs = 0
+
+		start = perf_counter()
+		with Pool(self.workers, _init_worker, (self.size, self.data, self.labels)) as pool:
+			for done, failures in pool.imap_unordered(_run_batch, batches):
+				programs += done
+				found += failures
+		elapsed = perf_counter() - start
+
+		# Se reducen los casos, primero uno de cada tipo de diferencia, y se
+		# agrupan por la forma del reproductor hasta tener 'max_shrink' distintos
+		generator = ProgramGenerator(self.size, self.data, self.labels)
+		checker = DifferentialChecker()
+		kinds: set[str] = set()
+		first = []
+		for failure in sorted(found):
+			if failure[1] not in kinds:
+				kinds.add(failure[1])
+				first.append(failure)
+		shapes: dict[tuple[str, ...], Failure] = {}
+		candidates = first + [failure for failure in sorted(found) if failure not in first]
+		for failed_seed, _ in candidates[:max_shrink * SHRINK_ATTEMPTS]:
+			if len(shapes) >= max_shrink: break
+			# Cualquier diferencia sirve: el mismo error puede verse como código o como símbolos
+			program = checker.shrink(generator.generate(failed_seed))
+			shape = program_shape(program)
+			if shape in shapes:
+				shapes[shape].count += 1
+				continue
+			shapes[shape] = Failure(failed_seed, checker.compare(program), program)
+		shrunk = list(shapes.values())
+
+		return FuzzReport(programs, len(found), shrunk, elapsed)
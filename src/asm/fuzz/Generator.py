@@ -0,0 +1,60 @@
+import random
+
+REGS = ['eax', 'ecx', 'edx', 'ebx', 'esi', 'edi']
+ALU = ['add', 'sub', 'and', 'or', 'xor', 'cmp', 'test']
+UNARY = ['inc', 'dec', 'mul', 'div', 'push', 'pop']
+JUMPS = ['jmp', 'je', 'jne', 'jz', 'jnz', 'jg', 'jge', 'jl', 'jle', 'ja', 'jae', 'jb', 'jbe', 'loop']
+DIRECTIVES = ['db', 'dw', 'dd']
+
+class ProgramGenerator:
+	"""
+	Genera programas aleatorios válidos con el subconjunto de
+	instrucciones que soportan ambos ensambladores. El mismo 'seed'
+	siempre produce el mismo programa.
+	"""
+
+	def __init__(self, size: int = 30, data: int = 4, labels: int = 4):
+		self.size = size
+		self.data = data
+		self.labels = labels
+
+	def generate(self, seed: int) -> list[str]:
+		rng = random.Random(seed)
+		variables = [f"v{i}" for i in range(rng.randint(1, self.data))]
+		labels = [f"l{i}" for i in range(rng.randint(1, self.labels))]
+
+		lines = ["section .data"]
+		for name in variables:
+			directive = rng.choice(DIRECTIVES)
+			limit = {'db': 0xFF, 'dw': 0xFFFF, 'dd': 0xFFFFFFFF}[directive]
+			lines.append(f"{name} {directive} {rng.randint(0, limit)}")
+
+		body = [self._instruction(rng, variables, labels) for _ in range(rng.randint(1, self.size))]
+		# Cada etiqueta se define una vez, en un punto al azar del cuerpo
+		for label in labels:
+			body.insert(rng.randint(0, len(body)), f"{label}:")
+
+		lines += ["section .text", "global _start", "_start:"]
+		lines += body
+		lines.append("int 0x80")
+		return lines
+
+	def _instruction(self, rng: random.Random, variables: list[str], labels: list[str]) -> str:
+		reg = rng.choice(REGS)
+		other = rng.choice(REGS)
+		var = rng.choice(variables)
+		imm = rng.choice([0, 1, 5, 127, 128, 255, 256, 65535, 0x7FFFFFFF, rng.randint(0, 0xFFFFFFFF)])
+		match rng.randrange(12):
+			case 0: return f"mov {reg}, {other}"
+			case 1: return f"mov {reg}, {imm}"
+			case 2: return f"mov {reg}, [{var}]"
+			case 3: return f"mov [{var}], {reg}"
+			case 4: return f"{rng.choice(ALU)} {reg}, {other}"
+			# Con inmediato solo existe 'cmp r32, imm8'
+			case 5: return f"cmp {reg}, {rng.randint(0, 127)}"
+			case 6: return f"{rng.choice(UNARY)} {reg}"
+			case 7: return f"lea {reg}, [{var}]"
+			case 8: return f"xchg {reg}, {other}"
+			case 9: return f"{rng.choice(JUMPS)} {rng.choice(labels)}"
+			case 10: return f"call {rng.choice(labels)}"
+			case _: return rng.choice(["ret", "nop", "int 0x80"])
@@ -0,0 +1,2 @@
+from .Generator import *
+from .Differential import *
\ No newline at end of file
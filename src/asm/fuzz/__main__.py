@@ -0,0 +1,17 @@
+from argparse import ArgumentParser
+from .Differential import *
+
+def main():
+	args = ArgumentParser(description="Fuzzing diferencial entre OnePassAssembler y TwoPassAssembler")
+	args.add_argument("-n", "--count", type=int, default=10000, help="programas a generar")
+	args.add_argument("-s", "--seed", type=int, default=0, help="primera semilla")
+	args.add_argument("-j", "--workers", type=int, default=None, help="procesos (por defecto, uno por CPU)")
+	args.add_argument("--size", type=int, default=30, help="instrucciones máximas por programa")
+	args.add_argument("--shrink", type=int, default=5, help="casos a reducir")
+	options = args.parse_args()
+
+	fuzzer = DifferentialFuzzer(options.size, workers=options.workers)
+	print(fuzzer.run(options.count, options.seed, options.shrink))
+
+if __name__ == "__main__":
+	main()
@@ -1,43 +1,58 @@
+from typing import Iterable
 from asm.common import *
 from asm.common.inst import *
 
-REGISTERS = {
-    'eax': 0, 'ecx': 1, 'edx': 2, 'ebx': 3, 'esp': 4, 'ebp': 5, 'esi': 6, 'edi': 7,
-    'ax': 0,  'cx': 1,  'dx': 2,  'bx': 3,  'sp': 4,  'bp': 5,  'si': 6,  'di': 7,
-    'al': 0,  'cl': 1,  'dl': 2,  'bl': 3,  'ah': 4,  'ch': 5,  'dh': 6,  'bh': 7
-}
+class OnePassContext(AssemblyContext):
+    def __init__(self, cache_size: int = 4096, strict: bool = True):
+        super().__init__(cache_size)
+        # Con 'strict' los errores se lanzan en vez de ignorar la línea
+        self.strict = strict
+        self.code_bytes = bytearray()
+        # Parches pendientes indexados por id de símbolo
+        self.pending_patches: list[list[tuple[int, str, int]] | None] = []
+        # Etiquetas que se alinean en modo de alineación automática
+        self.loop_heads: set[str] = set()
 
-class OnePassAssembler(AssemblerI, InstructionParser):
+class OnePassAssembler(AssemblerI):
 
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096, align_loops: int = 0):
         super().__init__("1 pasada")
-        self.symbol_table = SymbolTable()
-        self.ref_table = ReferenceTable()
-        self.current_address = 0x1000
-        self.code_bytes = bytearray()
-        self.pending_patches: dict[str, list[tuple[int, str, int]]] = {}
+        self.cache_size = cache_size
+        # Alineación automática de cabezas de ciclo (0 = desactivada)
+        self.align_loops = align_loops
 
     def assemble(self, filename) -> Result:
-        self.symbol_table = SymbolTable()
-        self.ref_table = ReferenceTable()
-        self.code_bytes = bytearray()
-        self.pending_patches = {}
-        self.current_address = 0x1000
-
         try:
             with open(filename, "r", encoding="utf-8") as file:
                 lines = file.read().splitlines()
         except FileNotFoundError:
             print(f"Error: No se encontró el archivo {filename}")
-            return Result(self.symbol_table, self.ref_table, "")
+            lines = []
+
+        return self.assemble_lines(lines, strict=False)
+
+    def assemble_lines(self, lines: Iterable[str], strict: bool = True) -> Result:
+        """Ensambla las líneas dadas. Sin 'strict' las líneas con errores se ignoran."""
+        ctx = OnePassContext(self.cache_size, strict)
+        if self.align_loops:
+            # Los saltos hacia atrás se conocen hasta después de la etiqueta
+            lines = list(lines)
+            ctx.loop_heads = find_loop_heads(lines)
 
-        for line in lines:
-            self._process_line(line)
+        for line in MacroProcessor(ctx.parser).process(lines):
+            if isinstance(line, str): self._process_line(ctx, line)
+            else: self._process_parsed(ctx, *line)
 
-        hex_code = " ".join(f"{b:02X}" for b in self.code_bytes)
-        return Result(self.symbol_table, self.ref_table, hex_code)
+        if strict:
+            missing = [ctx.interner.names[label_id] for label_id, patches in enumerate(ctx.pending_patches) if patches]
+            if missing: raise ValueError(f"Etiquetas no definidas: {', '.join(missing)}")
 
-    def _process_line(self, line: str):
+        hex_code = " ".join(f"{b:02X}" for b in ctx.code_bytes)
+        result = Result(ctx.symbol_table, ctx.ref_table, hex_code, ctx.code_bytes)
+        result.cache_stats = ctx.cache_stats()
+        return result
+
+    def _process_line(self, ctx: OnePassContext, line: str):
         code = line.strip()
         if not code or code.startswith(';'): return
         if ';' in code: code = code[:code.index(';')].strip()
@@ -46,8 +61,7 @@ class OnePassAssembler(AssemblerI, InstructionParser):
         if not tokens: return
 
         if code.endswith(':'):
-            label_name = code[:-1]
-            self._define_label(label_name)
+            self._process_parsed(ctx, ctx.interner.intern(code[:-1]), None)
             return
 
         if tokens[0].lower() in ['section', 'global']: return
@@ -57,18 +71,34 @@ class OnePassAssembler(AssemblerI, InstructionParser):
             directive = tokens[1].lower()
             value = ' '.join(tokens[2:]) if len(tokens) > 2 else ""
             
-            self._define_label(label)
+            self._define_label(ctx, ctx.interner.intern(label))
             data_bytes = self._encode_data_bytes(directive, value)
-            self._emit(data_bytes)
+            self._emit(ctx, data_bytes)
             return
 
         try:
-            inst = self.parseInstruction(code)
-            self._generate_inst_code(inst)
-        except Exception as e:
-            pass
+            inst = ctx.parser.parseInstruction(code)
+        except Exception:
+            if ctx.strict: raise
+            return
+        self._process_parsed(ctx, -1, inst)
+
+    def _process_parsed(self, ctx: OnePassContext, label_id: int, inst: Instruction | None):
+        # Elemento ya leído: etiqueta, dato o instrucción (p. ej. de una macro)
+        if inst is None:
+            if ctx.interner.names[label_id] in ctx.loop_heads:
+                self._emit(ctx, nop_padding(align_padding(ctx.current_address, self.align_loops)))
+            self._define_label(ctx, label_id)
+        elif isinstance(inst, DataDeclarationInstruction):
+            self._define_label(ctx, label_id)
+            self._emit(ctx, self._encode_data_bytes(inst.directive, inst.value))
+        else:
+            try:
+                self._generate_inst_code(ctx, inst)
+            except Exception:
+                if ctx.strict: raise
 
-    def _generate_inst_code(self, instruction: Instruction):
+    def _generate_inst_code(self, ctx: OnePassContext, instruction: Instruction):
         opcode = []
         
         match instruction:
@@ -76,12 +106,12 @@ class OnePassAssembler(AssemblerI, InstructionParser):
             case MoveInstruction():
                 if isinstance(instruction.dest, MemoryExpression):
                     opcode = [0x89] 
-                    modrm, addr_bytes = self._encode_mem_operand(instruction.src, instruction.dest)
+                    modrm, addr_bytes = self._encode_mem_operand(ctx, instruction.src, instruction.dest)
                     opcode.append(modrm)
                     opcode.extend(addr_bytes)
                 elif isinstance(instruction.src, MemoryExpression):
                     opcode = [0x8B]
-                    modrm, addr_bytes = self._encode_mem_operand(instruction.dest, instruction.src)
+                    modrm, addr_bytes = self._encode_mem_operand(ctx, instruction.dest, instruction.src)
                     opcode.append(modrm)
                     opcode.extend(addr_bytes)
                 elif isinstance(instruction.src, IntegerExpression):
@@ -96,7 +126,7 @@ class OnePassAssembler(AssemblerI, InstructionParser):
             
             case LeaInstruction():
                 opcode = [0x8D]
-                modrm, addr_bytes = self._encode_mem_operand(instruction.reg, instruction.mem)
+                modrm, addr_bytes = self._encode_mem_operand(ctx, instruction.reg, instruction.mem)
                 opcode.append(modrm)
                 opcode.extend(addr_bytes)
 
@@ -160,31 +190,31 @@ class OnePassAssembler(AssemblerI, InstructionParser):
                     opcode = [0x83, modrm, instruction.op2.value & 0xFF]
                 elif isinstance(instruction.op2, MemoryExpression):
                     opcode = [0x3B]
-                    modrm, addr_bytes = self._encode_mem_operand(instruction.op1, instruction.op2)
+                    modrm, addr_bytes = self._encode_mem_operand(ctx, instruction.op1, instruction.op2)
                     opcode.append(modrm)
                     opcode.extend(addr_bytes)
                 else:
                     opcode = [0x39, self._encode_reg_reg_byte(instruction.op1, instruction.op2)]
 
             # saltos y control
-            case LoopInstruction(): opcode = [0xE2, self._encode_rel_jump(instruction.label)]
-            case JmpInstruction(): opcode = [0xEB, self._encode_rel_jump(instruction.label)]
+            case LoopInstruction(): opcode = [0xE2, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JmpInstruction(): opcode = [0xEB, self._encode_rel_jump(ctx, instruction.label_id)]
             
             # Saltos Condicionales
-            case JeInstruction() | JzInstruction():   opcode = [0x74, self._encode_rel_jump(instruction.label)]
-            case JneInstruction() | JnzInstruction(): opcode = [0x75, self._encode_rel_jump(instruction.label)]
-            case JlInstruction():                     opcode = [0x7C, self._encode_rel_jump(instruction.label)]
-            case JleInstruction():                    opcode = [0x7E, self._encode_rel_jump(instruction.label)]
-            case JgInstruction():                     opcode = [0x7F, self._encode_rel_jump(instruction.label)]
-            case JgeInstruction():                    opcode = [0x7D, self._encode_rel_jump(instruction.label)]
-            case JaInstruction():                     opcode = [0x77, self._encode_rel_jump(instruction.label)]
-            case JaeInstruction():                    opcode = [0x73, self._encode_rel_jump(instruction.label)]
-            case JbInstruction():                     opcode = [0x72, self._encode_rel_jump(instruction.label)]
-            case JbeInstruction():                    opcode = [0x76, self._encode_rel_jump(instruction.label)]
+            case JeInstruction() | JzInstruction():   opcode = [0x74, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JneInstruction() | JnzInstruction(): opcode = [0x75, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JlInstruction():                     opcode = [0x7C, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JleInstruction():                    opcode = [0x7E, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JgInstruction():                     opcode = [0x7F, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JgeInstruction():                    opcode = [0x7D, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JaInstruction():                     opcode = [0x77, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JaeInstruction():                    opcode = [0x73, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JbInstruction():                     opcode = [0x72, self._encode_rel_jump(ctx, instruction.label_id)]
+            case JbeInstruction():                    opcode = [0x76, self._encode_rel_jump(ctx, instruction.label_id)]
 
             case CallInstruction():
                 opcode = [0xE8]
-                offset_bytes = self._encode_call_offset(instruction.label)
+                offset_bytes = self._encode_call_offset(ctx, instruction.label_id)
                 opcode.extend(offset_bytes)
 
             case RetInstruction():
@@ -196,89 +226,104 @@ class OnePassAssembler(AssemblerI, InstructionParser):
             
             case NopInstruction():
                 opcode = [0x90]
+
+            case AlignInstruction():
+                opcode = nop_padding(align_padding(ctx.current_address, instruction.boundary))
             
             case _:
                 opcode = [0x90]
 
-        self._emit(opcode)
+        self._emit(ctx, opcode)
 
     # metodos auxiliares
 
-    def _define_label(self, label: str):
-        if self.symbol_table.has_symbol(label): return
-        address = self.current_address
-        self.symbol_table.add_symbol(label, address)
-        if label in self.pending_patches:
-            for patch_pos, patch_type, origin_addr in self.pending_patches[label]:
-                self._apply_patch(patch_pos, patch_type, origin_addr, address)
-            del self.pending_patches[label]
+    def _define_label(self, ctx: OnePassContext, label_id: int):
+        if ctx.symbol_table.has_symbol_id(label_id): return
+        address = ctx.current_address
+        ctx.symbol_table.add_symbol_id(label_id, address)
+        if label_id < len(ctx.pending_patches) and ctx.pending_patches[label_id]:
+            for patch_pos, patch_type, origin_addr in ctx.pending_patches[label_id]:
+                self._apply_patch(ctx, patch_pos, patch_type, origin_addr, address)
+            ctx.pending_patches[label_id] = None
 
-    def _emit(self, bytes_list: list[int] | bytearray):
-        self.code_bytes.extend(bytes_list)
-        self.current_address += len(bytes_list)
+    def _emit(self, ctx: OnePassContext, bytes_list: list[int] | bytearray):
+        ctx.code_bytes.extend(bytes_list)
+        ctx.current_address += len(bytes_list)
 
-    def _encode_rel_jump(self, label: str) -> int:
+    def _encode_rel_jump(self, ctx: OnePassContext, label_id: int) -> int:
         # Salto corto de 8 bits
-        self._add_ref(label)
-        if self.symbol_table.has_symbol(label):
-            target = self.symbol_table.get_address(label)
-            offset = target - (self.current_address + 2)
+        self._add_ref(ctx, label_id)
+        target = ctx.symbol_table.get_address_id(label_id)
+        if target is not None:
+            offset = target - (ctx.current_address + 2)
             return offset & 0xFF
         else:
-            patch_pos = len(self.code_bytes) + 1
-            self._register_patch(label, patch_pos, "REL8", self.current_address)
+            patch_pos = len(ctx.code_bytes) + 1
+            self._register_patch(ctx, label_id, patch_pos, "REL8", ctx.current_address)
             return 0x00
 
-    def _encode_call_offset(self, label: str) -> list[int]:
+    def _encode_call_offset(self, ctx: OnePassContext, label_id: int) -> list[int]:
         # Salto relativo de 32 bits para CALL
-        self._add_ref(label)
-        if self.symbol_table.has_symbol(label):
-            target = self.symbol_table.get_address(label)
+        self._add_ref(ctx, label_id)
+        target = ctx.symbol_table.get_address_id(label_id)
+        if target is not None:
             # Offset = Target - (Current + 5 bytes de instr)
-            offset = target - (self.current_address + 5)
+            offset = target - (ctx.current_address + 5)
             return list(offset.to_bytes(4, 'little', signed=True))
         else:
-            patch_pos = len(self.code_bytes) + 1
-            self._register_patch(label, patch_pos, "REL32", self.current_address)
+            patch_pos = len(ctx.code_bytes) + 1
+            self._register_patch(ctx, label_id, patch_pos, "REL32", ctx.current_address)
             return [0, 0, 0, 0]
 
-    def _encode_mem_operand(self, reg_expr: Expression, mem_expr: MemoryExpression) -> tuple[int, list[int]]:
+    def _encode_mem_operand(self, ctx: OnePassContext, reg_expr: Expression, mem_expr: MemoryExpression) -> tuple[int, list[int]]:
         dest_reg = self._get_reg_id(reg_expr)
         modrm = (dest_reg << 3) | 5
         addr_bytes = [0, 0, 0, 0]
         if isinstance(mem_expr.address, IdentifierExpression):
-            label = mem_expr.address.name
-            self._add_ref(label)
-            if self.symbol_table.has_symbol(label):
-                addr = self.symbol_table.get_address(label)
+            label_id = mem_expr.address.id
+            if label_id < 0: raise ValueError(f"Direccionamiento por registro no soportado: [{mem_expr.address.name}]")
+            self._add_ref(ctx, label_id)
+            addr = ctx.symbol_table.get_address_id(label_id)
+            if addr is not None:
                 addr_bytes = list(addr.to_bytes(4, 'little'))
             else:
-                patch_pos = len(self.code_bytes) + 2 
-                self._register_patch(label, patch_pos, "ABS32", 0)
+                patch_pos = len(ctx.code_bytes) + 2 
+                self._register_patch(ctx, label_id, patch_pos, "ABS32", 0)
         return modrm, addr_bytes
 
-    def _register_patch(self, label: str, pos: int, type: str, origin: int):
-        if label not in self.pending_patches:
-            self.pending_patches[label] = []
-        self.pending_patches[label].append((pos, type, origin))
+    def _register_patch(self, ctx: OnePassContext, label_id: int, pos: int, type: str, origin: int):
+        # Un id negativo (p. ej. un registro) indexaría desde el final
+        if label_id < 0: raise ValueError(f"Id de símbolo inválido: {label_id}")
+        patches = ctx.pending_patches
+        missing = label_id + 1 - len(patches)
+        if missing > 0: patches.extend([None] * missing)
+        if patches[label_id] is None: patches[label_id] = []
+        patches[label_id].append((pos, type, origin))
 
-    def _apply_patch(self, pos: int, type: str, origin: int, target: int):
+    def _apply_patch(self, ctx: OnePassContext, pos: int, type: str, origin: int, target: int):
         if type == "REL8":
             offset = target - (origin + 2) 
-            self.code_bytes[pos] = offset & 0xFF
+            ctx.code_bytes[pos] = offset & 0xFF
         elif type == "REL32": # Para CALL
             offset = target - (origin + 5)
             bytes_val = offset.to_bytes(4, 'little', signed=True)
-            for i in range(4): self.code_bytes[pos + i] = bytes_val[i]
+            for i in range(4): ctx.code_bytes[pos + i] = bytes_val[i]
         elif type == "ABS32":
             bytes_val = target.to_bytes(4, 'little')
-            for i in range(4): self.code_bytes[pos + i] = bytes_val[i]
+            for i in range(4): ctx.code_bytes[pos + i] = bytes_val[i]
 
     def _encode_reg_reg_byte(self, dest, src) -> int:
+        self._require_registers(dest, src)
         return 0xC0 | (self._get_reg_id(src) << 3) | self._get_reg_id(dest)
 
+    def _require_registers(self, *operands):
+        # Solo existe la forma registro-registro: otra forma daría un opcode equivocado
+        for operand in operands:
+            if not isinstance(operand, IdentifierExpression) or operand.reg is None:
+                raise ValueError(f"Forma de operandos no soportada: se esperaba un registro, se recibió {type(operand).__name__}")
+
     def _get_reg_id(self, expr) -> int:
-        if isinstance(expr, IdentifierExpression): return REGISTERS.get(expr.name.lower(), 0)
+        if isinstance(expr, IdentifierExpression) and expr.reg is not None: return expr.reg
         return 0
 
     def _encode_data_bytes(self, directive, value_str) -> list[int]:
@@ -293,5 +338,5 @@ class OnePassAssembler(AssemblerI, InstructionParser):
         if isinstance(expr, IntegerExpression): return expr.value
         return 0
 
-    def _add_ref(self, label: str):
-        if hasattr(self.ref_table, 'add_usage'): self.ref_table.add_usage(label, self.current_address)
\ No newline at end of file
+    def _add_ref(self, ctx: OnePassContext, label_id: int):
+        ctx.ref_table.add_usage_id(label_id, ctx.current_address)
\ No newline at end of file
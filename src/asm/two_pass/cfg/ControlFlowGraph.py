@@ -0,0 +1,109 @@
+from typing import Callable
+from asm.common import *
+from asm.common.inst import *
+
+# Saltos que terminan el bloque sin continuar a la siguiente instrucción
+UNCONDITIONAL = (JmpInstruction, RetInstruction)
+
+class BasicBlock:
+	"""Secuencia de líneas (etiqueta, instrucción) con una sola entrada."""
+	__slots__ = ('index', 'entries', 'is_data', 'falls_through')
+
+	def __init__(self, index: int, is_data: bool = False):
+		self.index = index
+		self.entries: list[tuple[int, Instruction | None]] = []
+		self.is_data = is_data
+		self.falls_through = not is_data
+
+	def instructions(self):
+		return (inst for _, inst in self.entries if inst is not None)
+
+class EliminationReport:
+	def __init__(self):
+		self.blocks = 0
+		self.instructions = 0
+		self.data = 0
+		self.bytes = 0
+
+	def __str__(self):
+		return (f"Eliminados {self.bytes} bytes: {self.blocks} bloques inalcanzables "
+			f"({self.instructions} instrucciones) y {self.data} datos sin referencias")
+
+class ControlFlowGraph:
+	"""
+	Grafo de flujo de control sobre las líneas leídas por Parser.
+	Un bloque empieza en cada etiqueta y después de cada salto, llamada,
+	'loop' o 'ret'. Las declaraciones de datos consecutivas forman un
+	solo bloque: un búfer puede leerse más allá de su etiqueta, así que
+	se conserva completo si se usa cualquiera de sus etiquetas.
+	"""
+
+	def __init__(self, entries: list[tuple[int, Instruction | None]]):
+		self.blocks: list[BasicBlock] = []
+		# Bloque que define cada etiqueta (gana la última definición)
+		self.labels: dict[int, int] = {}
+
+		block = None
+		for entry in entries:
+			label_id, inst = entry
+			is_data = isinstance(inst, DataDeclarationInstruction)
+			# Los datos consecutivos comparten bloque
+			joins_data = is_data and block is not None and block.is_data
+			if not joins_data and (block is None or label_id >= 0 or is_data or block.is_data or not block.falls_through or self._ends_block(block)):
+				block = BasicBlock(len(self.blocks), is_data)
+				self.blocks.append(block)
+			# Se conserva el mismo elemento: quien llama puede reconocerlo en el resultado
+			block.entries.append(entry)
+			if label_id >= 0: self.labels[label_id] = block.index
+			if isinstance(inst, UNCONDITIONAL): block.falls_through = False
+
+	def _ends_block(self, block: BasicBlock) -> bool:
+		_, last = block.entries[-1]
+		return last is not None and hasattr(last, 'label_id') and not isinstance(last, DataDeclarationInstruction)
+
+	def successors(self, block: BasicBlock):
+		"""Bloques a los que puede pasar el control, o cuya dirección se usa."""
+		for inst in block.instructions():
+			if isinstance(inst, DataDeclarationInstruction): continue
+			if hasattr(inst, 'label_id'):
+				if inst.label_id in self.labels: yield self.labels[inst.label_id]
+				continue
+			for operand in vars(inst).values():
+				if isinstance(operand, MemoryExpression): operand = operand.address
+				if isinstance(operand, IdentifierExpression) and operand.reg is None and operand.id in self.labels:
+					yield self.labels[operand.id]
+		if block.falls_through and block.index + 1 < len(self.blocks):
+			yield block.index + 1
+
+	def reachable(self, roots: list[int]) -> list[bool]:
+		seen = [False] * len(self.blocks)
+		stack = [self.labels[id] for id in roots if id in self.labels]
+		while stack:
+			index = stack.pop()
+			if seen[index]: continue
+			seen[index] = True
+			stack.extend(s for s in self.successors(self.blocks[index]) if not seen[s])
+		return seen
+
+	def prune(self, roots: list[int], size: Callable[[Instruction], int]) -> tuple[list[tuple[int, Instruction | None]], EliminationReport]:
+		"""
+		Quita los bloques a los que no se llega desde 'roots' y los datos
+		que ninguna instrucción alcanzable usa. Sin raíces definidas no se
+		quita nada.
+		"""
+		report = EliminationReport()
+		if not any(id in self.labels for id in roots):
+			return [entry for block in self.blocks for entry in block.entries], report
+
+		kept = []
+		for block, live in zip(self.blocks, self.reachable(roots)):
+			if live:
+				kept.extend(block.entries)
+				continue
+			insts = list(block.instructions())
+			if block.is_data: report.data += len(insts)
+			else:
+				report.blocks += 1
+				report.instructions += len(insts)
+			report.bytes += sum(map(size, insts))
+		return kept, report
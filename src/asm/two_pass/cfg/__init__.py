@@ -0,0 +1 @@
+from .ControlFlowGraph import *
\ No newline at end of file
@@ -0,0 +1,380 @@
+import weakref
+from asm.common import *
+from asm.common.inst import *
+from .parser import Parser
+from .generator import CodeGenerator
+
+CHUNK_SIZE = 256
+
+class _Entry:
+	"""Estado de una línea del código fuente."""
+	__slots__ = ('chunk', 'layout_off', 'emit_off', 'label_id', 'inst', 'size',
+	             'code', 'code_size', 'refs', 'key', 'relative')
+
+	def __init__(self, label_id: int, inst: Instruction | None, size: int):
+		self.chunk: _Chunk
+		self.layout_off = 0
+		self.emit_off = 0
+		self.label_id = label_id
+		self.inst = inst
+		self.size = size
+		self.code = ""
+		self.code_size = 0
+		self.refs: tuple[int, ...] = ()
+		# Lo que determina el código de un parche: destino, o desplazamiento si es relativo
+		self.key: tuple = ()
+		# Los saltos dependen de su propia dirección, no solo del destino
+		self.relative = inst is not None and hasattr(inst, 'label_id') and not isinstance(inst, DataDeclarationInstruction)
+
+	def layout_address(self) -> int:
+		return self.chunk.layout_base + self.layout_off
+
+	def emit_address(self) -> int:
+		return self.chunk.emit_base + self.emit_off
+
+class _Chunk:
+	"""
+	Bloque de líneas consecutivas. Las direcciones de cada línea son
+	relativas al bloque, así que un cambio de tamaño solo mueve la base
+	de los bloques siguientes.
+	"""
+	__slots__ = ('entries', 'index', 'layout_base', 'emit_base', 'layout_size', 'emit_size')
+
+	def __init__(self, entries: list[_Entry]):
+		self.entries = entries
+		self.index = 0
+		self.layout_base = 0x1000
+		self.emit_base = 0x1000
+		self.layout_size = 0
+		self.emit_size = 0
+		for entry in entries: entry.chunk = self
+
+class _LiveSymbols:
+	"""Vista de la tabla de símbolos calculada a partir de las líneas actuales."""
+
+	def __init__(self, owner: 'IncrementalAssembler', interner: SymbolInterner):
+		self.owner = owner
+		self.interner = interner
+
+	def get_address_id(self, id: int) -> int | None:
+		return self.owner._label_address(id)
+
+class _EncodeContext(AssemblyContext):
+	"""Contexto que guarda los símbolos usados por la última instrucción."""
+
+	def __init__(self, symbols: _LiveSymbols):
+		super().__init__(0, symbols)
+		self.refs: list[int] = []
+
+class _Encoder(CodeGenerator):
+
+	def _add_ref(self, ctx, label_id):
+		ctx.refs.append(label_id)
+
+class _Fallback(Exception):
+	pass
+
+def _unsupported(line: str) -> bool:
+	"""Líneas que el modo incremental no maneja: directivas % (macros) y align."""
+	code = line.split(';', 1)[0].strip()
+	return code.startswith('%') or (code != '' and code.split(None, 1)[0].lower() == 'align')
+
+class _LazyResult(Result):
+	"""
+	Resultado del estado incremental que se calcula al leerlo, así una
+	edición no recorre todo el archivo. Si el ensamblador se edita antes
+	de leerlo, conserva las líneas de ese momento y se ensambla completo.
+	"""
+
+	def __init__(self, owner: 'IncrementalAssembler'):
+		self._owner = owner
+		self._lines: list[str] | None = None
+		self._tables: tuple[SymbolTable, ReferenceTable, str] | None = None
+		self._code = None
+		self.elimination = None
+		# El contexto se conserva entre ediciones hasta reconstruir: las cuentas se acumulan
+		self.cache_stats = owner.context.cache_stats()
+
+	def _detach(self):
+		if self._tables is None: self._lines = list(self._owner.lines)
+
+	def _build(self) -> tuple[SymbolTable, ReferenceTable, str]:
+		if self._tables is None:
+			if self._lines is None: self._tables = self._owner._snapshot()
+			else:
+				result = self._owner._assemble_full(self._lines)
+				self._tables = (result.symbolTable, result.referenceTable, result.machineCode)
+			self._lines = None
+		return self._tables
+
+	@property
+	def symbolTable(self) -> SymbolTable:
+		return self._build()[0]
+
+	@property
+	def referenceTable(self) -> ReferenceTable:
+		return self._build()[1]
+
+	@property
+	def machineCode(self) -> str:
+		return self._build()[2]
+
+class IncrementalAssembler(AssemblerI):
+	"""
+	Ensamblador de 2 pasadas que conserva el análisis, la disposición y
+	el código de cada línea. Tras una edición solo se vuelven a leer las
+	líneas cambiadas y a codificar las instrucciones cuyo destino u
+	origen se movió. El resultado es idéntico al de TwoPassAssembler.
+	"""
+
+	def __init__(self, cache_size: int = 4096):
+		super().__init__("2 pasadas (incremental)")
+		self.cache_size = cache_size
+		self.parser = Parser(cache_size)
+		self.encoder = _Encoder()
+		# Una sesión incremental guarda su propio estado: no es reentrante
+		self.context = AssemblyContext(cache_size)
+		self.encode_context = _EncodeContext(_LiveSymbols(self, self.context.interner))
+		self.lines: list[str] = []
+		self.chunks: list[_Chunk] = []
+		self.labels: dict[int, list[_Entry]] = {}
+		self.fixups: set[_Entry] = set()
+		# Falso si el estado no pudo construirse (se ensambla completo)
+		self.exact = False
+		# Líneas actuales que obligan a ensamblar completo
+		self.unsupported = 0
+		# Último resultado entregado, mientras no se haya calculado
+		self.pending: weakref.ref[_LazyResult] | None = None
+
+	def assemble(self, filename) -> Result:
+		try:
+			with open(filename, "r", encoding="utf-8") as file:
+				lines = file.read().splitlines()
+		except Exception as e:
+			print(f"Error parseando: {e}")
+			lines = []
+		return self.load(lines)
+
+	def assemble_lines(self, lines) -> Result:
+		return self.load(lines)
+
+	def load(self, lines: list[str]) -> Result:
+		self._detach_pending()
+		self.lines = list(lines)
+		self.unsupported = sum(map(_unsupported, self.lines))
+		self._rebuild()
+		return self.result()
+
+	def edit(self, start: int, end: int, new_lines: list[str]) -> Result:
+		"""Reemplaza las líneas [start, end) por 'new_lines' y reensambla."""
+		new_lines = list(new_lines)
+		self._detach_pending()
+		self.unsupported += sum(map(_unsupported, new_lines)) - sum(map(_unsupported, self.lines[start:end]))
+		self.lines[start:end] = new_lines
+		if not self.exact:
+			# Solo se intenta reconstruir si la edición quitó la causa conocida
+			if not self.unsupported: self._rebuild()
+			return self.result()
+		try:
+			self._apply(start, end, new_lines)
+		except Exception:
+			self._rebuild()
+		return self.result()
+
+	def result(self) -> Result:
+		if not self.exact: return self._assemble_full(self.lines)
+		result = _LazyResult(self)
+		self.pending = weakref.ref(result)
+		return result
+
+	def _assemble_full(self, lines: list[str]) -> Result:
+		parser, generator = Parser(self.cache_size), CodeGenerator()
+		parse_result = parser.readLines(lines, strict=True)
+		generated = generator.generateCode(parse_result.instructions, parse_result.symbol_table)
+		result = Result(parse_result.symbol_table, generated.referenceTable, None, generated.code, generated.sizes)
+		result.cache_stats = parse_result.cache_stats
+		return result
+
+	def _detach_pending(self):
+		# Un resultado sin calcular no debe ver el estado de la siguiente edición
+		result = self.pending() if self.pending is not None else None
+		if result is not None: result._detach()
+		self.pending = None
+
+	def _snapshot(self) -> tuple[SymbolTable, ReferenceTable, str]:
+		interner = self.context.interner
+		symbol_table = SymbolTable(interner)
+		ref_table = ReferenceTable(interner)
+		code_lines = []
+		for chunk in self.chunks:
+			for entry in chunk.entries:
+				if entry.label_id >= 0:
+					symbol_table.add_symbol_id(entry.label_id, entry.layout_address())
+				for ref in entry.refs:
+					ref_table.add_usage_id(ref, entry.emit_address())
+				if entry.code:
+					code_lines.append(entry.code)
+		return symbol_table, ref_table, "\n".join(code_lines)
+
+	# --- Construcción completa ---
+
+	def _rebuild(self):
+		self.context = AssemblyContext(self.cache_size)
+		self.encode_context = _EncodeContext(_LiveSymbols(self, self.context.interner))
+		self.labels = {}
+		self.fixups = set()
+		self.chunks = []
+		self.exact = False
+		if self.unsupported: return
+		try:
+			entries = [self._parse(line) for line in self.lines]
+			self.chunks = [_Chunk(entries[i:i + CHUNK_SIZE]) for i in range(0, len(entries), CHUNK_SIZE)]
+			self._reindex(0)
+			for chunk in self.chunks: self._layout(chunk)
+			self._rebase_layout(0)
+			for chunk in self.chunks:
+				chunk.emit_base = self._emit_end(chunk.index - 1)
+				self._emit(chunk)
+		except Exception:
+			return
+		self.exact = True
+
+	# --- Edición ---
+
+	def _apply(self, start: int, end: int, new_lines: list[str]):
+		first, first_line = self._locate(start)
+		last, _ = self._locate(max(end - 1, start))
+		merged = [entry for chunk in self.chunks[first:last + 1] for entry in chunk.entries]
+		lo, hi = start - first_line, end - first_line
+
+		removed = merged[lo:hi]
+		added = [self._parse(line) for line in new_lines]
+		for entry in removed:
+			if entry.label_id >= 0: self.labels[entry.label_id].remove(entry)
+			self.fixups.discard(entry)
+		merged[lo:hi] = added
+
+		old_layout_end = self._layout_end(last)
+		old_emit_end = self._emit_end(last)
+
+		chunks = [_Chunk(merged[i:i + CHUNK_SIZE]) for i in range(0, len(merged), CHUNK_SIZE)] or [_Chunk([])]
+		self.chunks[first:last + 1] = chunks
+		self._reindex(first)
+		for chunk in chunks:
+			chunk.layout_base = self._layout_end(chunk.index - 1)
+			self._layout(chunk)
+		after = first + len(chunks)
+		self._rebase_layout(after)
+
+		# Solo las líneas nuevas se codifican aquí; el resto se reparcha abajo
+		added_ids = set(map(id, added))
+		for chunk in chunks:
+			chunk.emit_base = self._emit_end(chunk.index - 1)
+			self._emit(chunk, added_ids)
+		self._rebase_emit(after)
+
+		moved = (self._layout_end(after - 1) != old_layout_end or self._emit_end(after - 1) != old_emit_end
+			or any(entry.label_id >= 0 for entry in removed) or any(entry.label_id >= 0 for entry in added))
+		if moved:
+			self._repatch(added_ids)
+
+	def _repatch(self, skip: set[int]):
+		fixup_key = self._fixup_key
+		for entry in list(self.fixups):
+			if entry.key == fixup_key(entry) or id(entry) in skip: continue
+			code_size = entry.code_size
+			self._encode(entry)
+			# Un cambio de tamaño movería los orígenes siguientes
+			if entry.code_size != code_size: raise _Fallback()
+
+	# --- Ayudantes ---
+
+	def _parse(self, line: str) -> _Entry:
+		# Las macros cambian la relación entre líneas y elementos: se ensambla completo
+		if _unsupported(line): raise _Fallback()
+		parsed = self.parser.parseLine(self.context, line)
+		if parsed is None: return _Entry(-1, None, 0)
+		label_id, inst = parsed
+		# El relleno depende de la dirección absoluta: se ensambla completo
+		if isinstance(inst, AlignInstruction): raise _Fallback()
+		entry = _Entry(label_id, inst, self.parser._estimateInstSize(inst) if inst is not None else 0)
+		if label_id >= 0: self.labels.setdefault(label_id, []).append(entry)
+		return entry
+
+	def _encode(self, entry: _Entry):
+		ctx = self.encode_context
+		ctx.refs = []
+		ctx.current_address = entry.emit_address()
+		entry.code = self.encoder.encodeInstruction(ctx, entry.inst)
+		entry.code_size = len(entry.code.replace(" ", "")) // 2
+		entry.refs = tuple(ctx.refs)
+		if entry.refs:
+			entry.key = self._fixup_key(entry)
+			self.fixups.add(entry)
+		else:
+			self.fixups.discard(entry)
+
+	def _fixup_key(self, entry: _Entry) -> tuple:
+		origin = entry.chunk.emit_base + entry.emit_off if entry.relative else 0
+		key = []
+		for ref in entry.refs:
+			target = self._label_address(ref)
+			key.append(target - origin if target is not None else None)
+		return tuple(key)
+
+	def _layout(self, chunk: _Chunk):
+		offset = 0
+		for entry in chunk.entries:
+			entry.layout_off = offset
+			offset += entry.size
+		chunk.layout_size = offset
+
+	def _emit(self, chunk: _Chunk, only: set[int] | None = None):
+		offset = 0
+		for entry in chunk.entries:
+			entry.emit_off = offset
+			if entry.inst is not None and (only is None or id(entry) in only):
+				self._encode(entry)
+			offset += entry.code_size
+		chunk.emit_size = offset
+
+	def _rebase_layout(self, start: int):
+		chunks = self.chunks
+		for i in range(max(start, 1), len(chunks)):
+			chunks[i].layout_base = chunks[i - 1].layout_base + chunks[i - 1].layout_size
+
+	def _rebase_emit(self, start: int):
+		chunks = self.chunks
+		for i in range(max(start, 1), len(chunks)):
+			chunks[i].emit_base = chunks[i - 1].emit_base + chunks[i - 1].emit_size
+
+	def _reindex(self, start: int):
+		for i in range(start, len(self.chunks)):
+			self.chunks[i].index = i
+
+	def _locate(self, line: int) -> tuple[int, int]:
+		"""Regresa (índice del bloque que contiene 'line', primera línea del bloque)."""
+		first_line = 0
+		for i, chunk in enumerate(self.chunks):
+			if line < first_line + len(chunk.entries) or i == len(self.chunks) - 1:
+				return i, first_line
+			first_line += len(chunk.entries)
+		raise _Fallback()
+
+	def _layout_end(self, index: int) -> int:
+		chunk = self.chunks[index] if index >= 0 else None
+		return chunk.layout_base + chunk.layout_size if chunk else 0x1000
+
+	def _emit_end(self, index: int) -> int:
+		chunk = self.chunks[index] if index >= 0 else None
+		return chunk.emit_base + chunk.emit_size if chunk else 0x1000
+
+	def _label_address(self, label_id: int) -> int | None:
+		entries = self.labels.get(label_id)
+		if not entries: return None
+		if len(entries) == 1:
+			entry = entries[0]
+			return entry.chunk.layout_base + entry.layout_off
+		# Etiqueta repetida: gana la última definición, como en Parser
+		last = max(entries, key=lambda e: (e.chunk.index, e.chunk.entries.index(e)))
+		return last.layout_address()
@@ -1,54 +1,160 @@
+from typing import Iterable, Iterator
 from asm.common import *
 from asm.common.inst import *
+from asm.two_pass.spill import *
+from asm.two_pass.cfg import *
 
 class ParseResult:
-	def __init__(self, instructions: list[Instruction], symbol_table: SymbolTable):
+	def __init__(self, instructions: list[Instruction], symbol_table: SymbolTable, elimination: EliminationReport | None = None,
+			cache_stats: dict[str, CacheStats] | None = None):
 		self.instructions = instructions
 		self.symbol_table = symbol_table
+		self.elimination = elimination
+		self.cache_stats = cache_stats
 
-class Parser(InstructionParser):
-	def __init__(self):
-		self.symbol_table: SymbolTable
+	def close(self):
+		# Libera el archivo temporal del modo fuera de memoria
+		if isinstance(self.instructions, SpillReader): self.instructions.close()
+
+class ParseContext(AssemblyContext):
+	"""Contexto de la pasada 1: instrucciones colocadas y reporte de eliminación."""
+
+	def __init__(self, cache_size: int = 4096):
+		super().__init__(cache_size)
+		self.instructions: list[Instruction] | SpillWriter = []
+		self.elimination: EliminationReport | None = None
+
+class Parser:
+	def __init__(self, cache_size: int = 4096, spill: bool = False, eliminate: bool = False, align_loops: int = 0):
+		self.cache_size = cache_size
+		# Fuera de memoria: las instrucciones se guardan en un archivo temporal
+		self.spill = spill
+		# Quitar código inalcanzable desde _start/global y datos sin usar
+		self.eliminate = eliminate
+		# Alineación automática de cabezas de ciclo (0 = desactivada)
+		self.align_loops = align_loops
 	
 	def readInstructions(self, filename: str) -> ParseResult:
-		self.symbol_table = SymbolTable()
-		self.current_address = 0x1000 
-		instructions: list[Instruction] = []
-
 		try:
 			with open(filename, "r", encoding="utf-8") as file:
+				if self.spill:
+					return self.readLines(line for raw in file for line in raw.splitlines())
 				lines = file.read().splitlines()
-				for line in lines:
-					code = line.strip()
-					if not code or code.startswith(';'): continue
-					if ';' in code: code = code[:code.index(';')].strip()
-					if not code: continue
-					
-					tokens = code.split()
-					if tokens[0].lower() in ['section', 'global']: continue
-					
-					if code.endswith(':'):
-						self.symbol_table.add_symbol(code[:-1], self.current_address)
-						continue
-					
-					if len(tokens) >= 2 and tokens[1].lower() in ['dd', 'dw', 'db']:
-						label, directive = tokens[0], tokens[1].lower()
-						value = ' '.join(tokens[2:]) if len(tokens) > 2 else ""
-						self.symbol_table.add_symbol(label, self.current_address)
-						self.current_address += {'db': 1, 'dw': 2, 'dd': 4}.get(directive, 4)
-						instructions.append(DataDeclarationInstruction(label, directive, value))
-						continue
-					
-					inst = self.parseInstruction(code)
-					instructions.append(inst)
-					self.current_address += self._estimateInstSize(inst)
+		except Exception as e:
+			print(f"Error parseando: {e}")
+			lines = []
+		return self.readLines(lines)
+	
+	def readLines(self, lines: Iterable[str], strict: bool = False) -> ParseResult:
+		"""Lee las líneas dadas. Con 'strict' los errores se lanzan en vez de imprimirse."""
+		ctx = ParseContext(self.cache_size)
+		if self.spill: ctx.instructions = SpillWriter(ctx.interner)
+		try:
+			for _ in self.placeLines(ctx, lines, strict): pass
+		except Exception:
+			if isinstance(ctx.instructions, SpillWriter): ctx.instructions.file.close()
+			raise
+		instructions = ctx.instructions
+		if isinstance(instructions, SpillWriter):
+			instructions = instructions.reader()
+		return ParseResult(instructions, ctx.symbol_table, ctx.elimination, ctx.cache_stats())
+	
+	def placeLines(self, ctx: ParseContext, lines: Iterable[str], strict: bool = False) -> Iterator[tuple[str, Parsed]]:
+		"""
+		Pasada 1: lee las líneas y coloca cada elemento en ctx.instructions,
+		asignando su dirección a cada etiqueta. Regresa (línea de origen,
+		elemento) en el orden en que se colocan; con eliminación, solo los
+		que se conservan. El origen de la alineación automática es 'align N'.
+		"""
+		roots = ["_start"]
+		items = self._readItems(ctx, lines, roots)
+		if not self.eliminate:
+			try:
+				for source, parsed in items:
+					self._place(ctx, *parsed)
+					yield source, parsed
+			except Exception as e:
+				if strict: raise
+				print(f"Error parseando: {e}")
+			return
 		
+		# Con eliminación, la disposición espera a que se conozca todo el grafo
+		read: list[tuple[str, Parsed]] = []
+		try:
+			for item in items: read.append(item)
 		except Exception as e:
+			if strict: raise
 			print(f"Error parseando: {e}")
-		return ParseResult(instructions, self.symbol_table)
+		root_ids = [ctx.interner.lookup(name) for name in roots]
+		kept, ctx.elimination = ControlFlowGraph([parsed for _, parsed in read]).prune(root_ids, self._estimateInstSize)
+		# Los elementos conservados son los mismos objetos, en el mismo orden
+		remaining = iter(read)
+		for parsed in kept:
+			source = next(source for source, entry in remaining if entry is parsed)
+			self._place(ctx, *parsed)
+			yield source, parsed
+	
+	def _readItems(self, ctx: ParseContext, lines: Iterable[str], roots: list[str]) -> Iterator[tuple[str, Parsed]]:
+		"""Elementos leídos con su línea de origen; agrega a 'roots' los nombres 'global'."""
+		heads: set[int] = set()
+		if self.align_loops:
+			# Los saltos hacia atrás se conocen hasta después de la etiqueta
+			lines = list(lines)
+			heads = {ctx.interner.intern(name) for name in find_loop_heads(lines)}
+		
+		for source, line in MacroProcessor(ctx.parser).processWithSource(lines):
+			# Las expansiones de macros ya vienen leídas
+			parsed = self.parseLine(ctx, line) if isinstance(line, str) else line
+			if parsed is None:
+				roots += self._parseGlobals(line)
+				continue
+			
+			label_id, inst = parsed
+			if inst is None and label_id in heads:
+				yield f"align {self.align_loops}", (-1, AlignInstruction(self.align_loops))
+			yield source, parsed
+	
+	def _place(self, ctx: ParseContext, label_id: int, inst: Instruction | None):
+		"""Asigna la dirección actual a la etiqueta y agrega la instrucción."""
+		if label_id >= 0:
+			ctx.symbol_table.add_symbol_id(label_id, ctx.current_address)
+		if inst is not None:
+			ctx.instructions.append(inst)
+			ctx.current_address += self._estimateInstSize(inst, ctx.current_address)
+	
+	def _parseGlobals(self, line: str) -> list[str]:
+		tokens = line.split(';', 1)[0].split(None, 1)
+		if len(tokens) < 2 or tokens[0].lower() != 'global': return []
+		return [name.strip() for name in tokens[1].split(',') if name.strip()]
+	
+	def parseLine(self, ctx: AssemblyContext, line: str) -> Parsed | None:
+		"""
+		Lee una línea de código. Regresa None si la línea no genera nada,
+		o (id de etiqueta definida o -1, instrucción o None).
+		"""
+		code = line.strip()
+		if not code or code.startswith(';'): return None
+		if ';' in code: code = code[:code.index(';')].strip()
+		if not code: return None
+		
+		tokens = code.split()
+		if tokens[0].lower() in ['section', 'global']: return None
+		
+		if code.endswith(':'):
+			return ctx.interner.intern(code[:-1]), None
+		
+		if len(tokens) >= 2 and tokens[1].lower() in ['dd', 'dw', 'db']:
+			label, directive = tokens[0], tokens[1].lower()
+			value = ' '.join(tokens[2:]) if len(tokens) > 2 else ""
+			label_id = ctx.interner.intern(label)
+			return label_id, DataDeclarationInstruction(ctx.interner.names[label_id], directive, value, label_id)
+		
+		return -1, ctx.parser.parseInstruction(code)
 	
-	def _estimateInstSize(self, inst: Instruction) -> int:
+	def _estimateInstSize(self, inst: Instruction, address: int = 0) -> int:
 		match inst:
+			# Relleno hasta la siguiente frontera
+			case AlignInstruction(): return align_padding(address, inst.boundary)
 			# 1 Byte
 			case RetInstruction() | NopInstruction() | PushInstruction() | PopInstruction() | IncInstruction() | DecInstruction(): return 1
 			# 2 Bytes (Saltos cortos, Reg-Reg, Int)
@@ -72,5 +178,6 @@ class Parser(InstructionParser):
 			case AndInstruction() | OrInstruction() | XorInstruction() | AddInstruction() | SubInstruction() | MovzxInstruction() | XchgInstruction():
 				return 2
 			case MulInstruction() | DivInstruction(): return 2
+			case DataDeclarationInstruction(): return {'db': 1, 'dw': 2, 'dd': 4}.get(inst.directive, 4)
 			case _: return 1
 	
\ No newline at end of file
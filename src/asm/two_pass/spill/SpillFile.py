@@ -0,0 +1,146 @@
+import mmap
+import struct
+import tempfile
+from asm.common import *
+from asm.common.inst import *
+
+# Clases de instrucción en el orden de su código dentro del registro
+KINDS: list[type] = [
+	MoveInstruction, AddInstruction, SubInstruction, XorInstruction, AndInstruction,
+	OrInstruction, MovzxInstruction, XchgInstruction, CmpInstruction, TestInstruction,
+	LeaInstruction, IncInstruction, DecInstruction, MulInstruction, ImulInstruction,
+	DivInstruction, IdivInstruction, PushInstruction, PopInstruction, IntInstruction,
+	JmpInstruction, JeInstruction, JneInstruction, JleInstruction, JlInstruction,
+	JzInstruction, JnzInstruction, JaInstruction, JaeInstruction, JbInstruction,
+	JbeInstruction, JgInstruction, JgeInstruction, CallInstruction, LoopInstruction,
+	RetInstruction, NopInstruction, DataDeclarationInstruction, ImulTwoInstruction,
+	AlignInstruction,
+]
+KIND_IDS = {cls: i for i, cls in enumerate(KINDS)}
+
+# Atributos de operando de cada clase, en el orden de su constructor
+OPERANDS: dict[type, tuple[str, ...]] = {
+	MoveInstruction: ('dest', 'src'), AddInstruction: ('dest', 'src'),
+	SubInstruction: ('dest', 'src'), XorInstruction: ('dest', 'src'),
+	AndInstruction: ('dest', 'src'), OrInstruction: ('dest', 'src'),
+	MovzxInstruction: ('dest', 'src'), ImulTwoInstruction: ('dest', 'src'),
+	XchgInstruction: ('op1', 'op2'), CmpInstruction: ('op1', 'op2'), TestInstruction: ('op1', 'op2'),
+	LeaInstruction: ('reg', 'mem'),
+	IncInstruction: ('op',), DecInstruction: ('op',), MulInstruction: ('op',), ImulInstruction: ('op',),
+	DivInstruction: ('op',), IdivInstruction: ('op',), PushInstruction: ('op',), PopInstruction: ('op',),
+	IntInstruction: ('imm8',),
+}
+
+DIRECTIVES = ['db', 'dw', 'dd']
+
+# Los registros no tienen id de símbolo: se guarda su índice en esta lista
+REGISTER_NAMES = list(REGISTERS)
+
+# Tipos de operando
+NONE, INTEGER, IDENTIFIER, MEMORY, DATA = range(5)
+
+# tipo de instrucción, id de etiqueta, y dos operandos (tipo, registro, id, valor)
+RECORD = struct.Struct("<BiBbiqBbiq")
+NO_OPERAND = (NONE, -1, -1, 0)
+
+def _pack_operand(expr: Expression) -> tuple[int, int, int, int]:
+	match expr:
+		case IntegerExpression():
+			return INTEGER, -1, -1, expr.value
+		case IdentifierExpression():
+			return IDENTIFIER, *_pack_identifier(expr), 0
+		case MemoryExpression(address=IdentifierExpression() as address):
+			return MEMORY, *_pack_identifier(address), 0
+	raise ValueError(f"Operando no soportado en IR compacto: {expr}")
+
+def _pack_identifier(expr: IdentifierExpression) -> tuple[int, int]:
+	if expr.reg is None: return -1, expr.id
+	return expr.reg, REGISTER_NAMES.index(expr.name.lower())
+
+def _unpack_identifier(names: list[str], reg: int, id: int) -> IdentifierExpression:
+	if reg < 0: return IdentifierExpression(names[id], id)
+	return IdentifierExpression(REGISTER_NAMES[id], -1, reg)
+
+def _unpack_operand(names: list[str], kind: int, reg: int, id: int, value: int) -> Expression:
+	match kind:
+		case 1: return IntegerExpression(value)
+		case 2: return _unpack_identifier(names, reg, id)
+		case 3: return MemoryExpression(_unpack_identifier(names, reg, id))
+	raise ValueError(f"Tipo de operando inválido en IR compacto: {kind}")
+
+class SpillWriter:
+	"""
+	Escribe instrucciones como registros binarios de ancho fijo en un
+	archivo temporal. Tiene la interfaz de lista que usa Parser (append).
+	"""
+
+	def __init__(self, interner: SymbolInterner, buffer_records: int = 4096):
+		self.interner = interner
+		self.file = tempfile.TemporaryFile()
+		self.buffer = bytearray()
+		self.buffer_size = buffer_records * RECORD.size
+		self.count = 0
+
+	def append(self, inst: Instruction):
+		kind = KIND_IDS[type(inst)]
+		if isinstance(inst, DataDeclarationInstruction):
+			try: value = int(inst.value)
+			except: value = 0
+			op1 = (DATA, DIRECTIVES.index(inst.directive), -1, value & 0xFFFFFFFF)
+			record = (kind, inst.label_id, *op1, *NO_OPERAND)
+		elif isinstance(inst, AlignInstruction):
+			record = (kind, -1, INTEGER, -1, -1, inst.boundary, *NO_OPERAND)
+		elif hasattr(inst, 'label_id'):
+			record = (kind, inst.label_id, *NO_OPERAND, *NO_OPERAND)
+		else:
+			ops = [_pack_operand(getattr(inst, name)) for name in OPERANDS.get(type(inst), ())]
+			ops += [NO_OPERAND] * (2 - len(ops))
+			record = (kind, -1, *ops[0], *ops[1])
+		self.buffer += RECORD.pack(*record)
+		self.count += 1
+		if len(self.buffer) >= self.buffer_size: self._flush()
+
+	def _flush(self):
+		self.file.write(self.buffer)
+		self.buffer.clear()
+
+	def reader(self) -> 'SpillReader':
+		self._flush()
+		self.file.flush()
+		return SpillReader(self.file, self.interner, self.count)
+
+	def __len__(self):
+		return self.count
+
+class SpillReader:
+	"""Lee de vuelta, vía mmap, las instrucciones escritas por SpillWriter."""
+
+	def __init__(self, file, interner: SymbolInterner, count: int):
+		self.file = file
+		self.interner = interner
+		self.count = count
+
+	def __iter__(self):
+		if self.count == 0: return
+		names = self.interner.names
+		with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+			for kind, label_id, k1, r1, i1, v1, k2, r2, i2, v2 in RECORD.iter_unpack(view):
+				cls = KINDS[kind]
+				if k1 == DATA:
+					yield cls(names[label_id], DIRECTIVES[r1], str(v1), label_id)
+				elif label_id >= 0:
+					yield cls(names[label_id], label_id)
+				elif cls is AlignInstruction:
+					yield cls(v1)
+				elif k1 == NONE:
+					yield cls()
+				elif k2 == NONE:
+					yield cls(_unpack_operand(names, k1, r1, i1, v1))
+				else:
+					yield cls(_unpack_operand(names, k1, r1, i1, v1), _unpack_operand(names, k2, r2, i2, v2))
+
+	def close(self):
+		self.file.close()
+
+	def __len__(self):
+		return self.count
@@ -0,0 +1 @@
+from .SpillFile import *
\ No newline at end of file
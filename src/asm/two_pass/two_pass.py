@@ -1,12 +1,12 @@
-from .parser import Parser
+from .parser import Parser, ParseResult
 from .generator import CodeGenerator
 from asm.common import *
 
 class TwoPassAssembler(AssemblerI):
 
-	def __init__(self):
+	def __init__(self, cache_size: int = 4096, spill: bool = False, eliminate: bool = False, align_loops: int = 0):
 		super().__init__("2 pasadas")
-		self.parser = Parser()
+		self.parser = Parser(cache_size, spill, eliminate, align_loops)
 		self.codeGenerator = CodeGenerator()
 
 	def assemble(self, filename) -> Result:
@@ -15,14 +15,31 @@ class TwoPassAssembler(AssemblerI):
 		# Pasada 1: El parser lee el archivo y genera la tabla de símbolos
 		parse_result = self.parser.readInstructions(filename)
 
+		if parse_result.elimination is not None:
+			print(parse_result.elimination)
+
 		print(f"Generando código...")
-		# Pasada 2: El generador usa las instrucciones y la tabla para crear el hex
-		assembler_result = self.codeGenerator.generateCode(
-			parse_result.instructions, 
-			parse_result.symbol_table
-		)
+		return self._generate(parse_result)
+
+	def assemble_lines(self, lines) -> Result:
+		return self._generate(self.parser.readLines(lines, strict=True))
+
+	def _generate(self, parse_result: ParseResult) -> Result:
+		# Pasada 2: El generador usa las instrucciones y la tabla para crear el código
+		try:
+			assembler_result = self.codeGenerator.generateCode(
+				parse_result.instructions, 
+				parse_result.symbol_table
+			)
+		finally:
+			parse_result.close()
 
-		return Result(
+		result = Result(
 			parse_result.symbol_table, 
 			assembler_result.referenceTable, 
-			assembler_result.code)
\ No newline at end of file
+			None,
+			assembler_result.code,
+			assembler_result.sizes)
+		result.elimination = parse_result.elimination
+		result.cache_stats = parse_result.cache_stats
+		return result
\ No newline at end of file
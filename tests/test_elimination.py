@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from asm.two_pass.two_pass import TwoPassAssembler
+
+def test_buffer_reached_through_neighbouring_label_is_kept():
+	lines = ["section .data", "m0 db 72", "m1 db 105",
+		"section .text", "global _start", "_start:",
+		"lea ecx, [m0]", "mov edx, 2", "mov ebx, 1", "mov eax, 4", "int 0x80"]
+	full = TwoPassAssembler().assemble_source(lines)
+	pruned = TwoPassAssembler(eliminate=True).assemble_source(lines)
+	assert pruned.code == full.code
+	assert pruned.symbols == full.symbols
+	assert pruned.elimination.data == 0
+
+def test_unreferenced_data_run_is_removed():
+	lines = ["m0 db 72", "m1 db 105", "_start:", "mov eax, 1", "int 0x80", "ret", "n0 dd 5", "n1 dd 6"]
+	pruned = TwoPassAssembler(eliminate=True).assemble_source(lines)
+	assert set(pruned.symbols) == {"_start"}
+	assert pruned.elimination.data == 4
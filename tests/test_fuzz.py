@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from asm.fuzz import DifferentialChecker, ProgramGenerator
+from asm.one_pass import OnePassAssembler
+from asm.two_pass.two_pass import TwoPassAssembler
+
+def test_generated_programs_assemble_identically():
+	generator, checker = ProgramGenerator(), DifferentialChecker()
+	for seed in range(200):
+		program = generator.generate(seed)
+		assert checker.compare(program) is None, program
+		OnePassAssembler().assemble_source(program)
+
+@pytest.mark.parametrize("assembler", [OnePassAssembler, TwoPassAssembler])
+@pytest.mark.parametrize("line", ["add eax, 5", "test ecx, 94", "xor edx, [v]", "mov eax, v"])
+def test_unsupported_operand_forms_are_rejected(assembler, line):
+	with pytest.raises(ValueError, match="no soportada"):
+		assembler().assemble_source([line, "v dd 1"])
@@ -0,0 +1,78 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from asm.one_pass import OnePassAssembler
+from asm.two_pass.two_pass import TwoPassAssembler
+from asm.two_pass.incremental import IncrementalAssembler
+
+LABELS = ["a", "b", "c", "d", "e"]
+
+def random_line(rnd: random.Random) -> str:
+	label = rnd.choice(LABELS)
+	return rnd.choice([f"jmp {label}", f"call {label}", f"mov eax, [{label}]", f"mov [{label}], ebx",
+		"add eax, ebx", "mov ecx, 5", f"{label} dd 7", "; comentario", "", "inc ecx", f"jne {label}"])
+
+def outcome(assemble, *args):
+	try:
+		result = assemble(*args)
+	except Exception as e:
+		return type(e)
+	return result.machineCode, result.symbols, result.references
+
+def check_edits(rnd: random.Random, lines: list[str], edits: int) -> IncrementalAssembler:
+	assembler = IncrementalAssembler()
+	assert outcome(assembler.load, lines) == outcome(TwoPassAssembler().assemble_source, lines)
+	for _ in range(edits):
+		start = rnd.randrange(len(lines) - len(LABELS))
+		end = min(len(lines) - len(LABELS), start + rnd.randrange(3))
+		new_lines = [random_line(rnd) for _ in range(rnd.randrange(3))]
+		lines[start:end] = new_lines
+		assert outcome(assembler.edit, start, end, new_lines) == outcome(TwoPassAssembler().assemble_source, lines), lines
+	return assembler
+
+def test_random_edits_match_two_pass():
+	rnd = random.Random(0)
+	for _ in range(40):
+		lines = [random_line(rnd) for _ in range(rnd.randrange(5, 40))] + [f"{label}:" for label in LABELS]
+		assert check_edits(rnd, lines, 10).exact
+
+def test_fallback_matches_two_pass_and_recovers():
+	rnd = random.Random(1)
+	lines = ["align 16", "%macro salta 1", "jmp %1", "%endmacro", "salta a"]
+	lines += [random_line(rnd) for _ in range(20)] + [f"{label}:" for label in LABELS]
+	assembler = check_edits(rnd, lines[:], 0)
+	assert not assembler.exact
+
+	# Mientras queden líneas sin soporte no se intenta reconstruir
+	rebuilds = []
+	rebuild = assembler._rebuild
+	assembler._rebuild = lambda: (rebuilds.append(1), rebuild())
+	assembler.edit(5, 6, ["inc ecx"])
+	assert rebuilds == [] and not assembler.exact
+	lines[5:6] = ["inc ecx"]
+
+	# Quitar la alineación y las macros regresa al modo incremental
+	assembler.edit(0, 5, ["jmp a"])
+	lines[0:5] = ["jmp a"]
+	assert rebuilds == [1] and assembler.exact
+	assert outcome(assembler.result) == outcome(TwoPassAssembler().assemble_source, lines)
+
+def test_undefined_label_raises_value_error():
+	for lines in (["jmp nowhere"], ["align 16", "call nowhere"], ["mov eax, [nowhere]"]):
+		for assemble in (IncrementalAssembler().load, TwoPassAssembler().assemble_source, OnePassAssembler().assemble_source):
+			with pytest.raises(ValueError, match="nowhere"):
+				assemble(lines)
+
+def test_unread_result_keeps_its_own_state():
+	rnd = random.Random(2)
+	lines = [random_line(rnd) for _ in range(30)] + [f"{label}:" for label in LABELS]
+	assembler = IncrementalAssembler()
+	first = assembler.load(lines)
+	expected = outcome(TwoPassAssembler().assemble_source, lines)
+	assembler.edit(0, 3, ["jmp e", "mov ecx, 5"])
+	assert outcome(lambda: first) == expected
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from asm.common import ReferenceTable, SymbolTable
+from asm.one_pass import OnePassAssembler
+from asm.two_pass.two_pass import TwoPassAssembler
+
+ASSEMBLERS = [OnePassAssembler, TwoPassAssembler]
+
+@pytest.mark.parametrize("assembler", ASSEMBLERS)
+def test_expansion_matches_written_out_code(assembler):
+	macro = ["%macro suma 2", "mov eax, [%1]", "add eax, %2", "mov [%1], eax", "%endmacro"]
+	expanded = assembler().assemble_source(macro + ["_start:", "suma v, ebx", "suma w, ecx", "v dd 1", "w dd 2"])
+	written = assembler().assemble_source(["_start:", "mov eax, [v]", "add eax, ebx", "mov [v], eax",
+		"mov eax, [w]", "add eax, ecx", "mov [w], eax", "v dd 1", "w dd 2"])
+	assert expanded.code == written.code
+	assert expanded.symbols == written.symbols
+
+@pytest.mark.parametrize("assembler", ASSEMBLERS)
+def test_local_labels_are_distinct_per_expansion(assembler):
+	lines = ["%macro espera 0", "%%otra:", "dec ecx", "jnz %%otra", "%endmacro", "espera", "espera"]
+	assert assembler().assemble_source(lines).code.hex() == "49" "75fd" "49" "75fd"
+
+@pytest.mark.parametrize("assembler", ASSEMBLERS)
+@pytest.mark.parametrize("body, arg", [
+	("jmp %1", "eax"),
+	("call %1", "ebx"),
+	("mov eax, [%1]", "ecx"),
+	("mov eax, [%1]", "5"),
+	("%1 dd 3", "edx"),
+	("%1:", "esi"),
+])
+def test_non_label_arguments_are_rejected(assembler, body, arg):
+	lines = ["jmp fin", "%macro x 1", body, "%endmacro", f"x {arg}", "fin:", "f:"]
+	with pytest.raises(ValueError, match="Macro x"):
+		assembler().assemble_source(lines)
+
+def test_tables_refuse_negative_ids():
+	with pytest.raises(ValueError):
+		SymbolTable().add_symbol_id(-1, 0x1000)
+	with pytest.raises(ValueError):
+		ReferenceTable().add_usage_id(-1, 0x1000)